@@ -0,0 +1,195 @@
+import asyncio
+import math
+import time
+from collections import deque
+
+from fastapi import Depends, HTTPException, status
+
+import metrics
+
+'''
+LLM/임베딩 엔드포인트 동시 실행 제한 (admission control)
+
+라우트별로 동시 실행 수와 대기열 길이를 제한한다. 대기는 스레드풀이 아닌
+이벤트 루프에서 하므로 대기 중인 요청이 스레드를 점유하지 않는다.
+  - 대기열이 가득 차거나 최대 대기 시간을 넘기면 503 + Retry-After
+  - 사용자별 진행 중(실행 + 대기) 요청이 한도를 넘으면 429 + Retry-After
+  - 빈 자리는 실행 중인 요청이 가장 적은 사용자의 대기 요청부터 배정 (공정 분배)
+제한은 워커 프로세스 단위이며, 한도가 0 이면 해당 제한을 두지 않는다.
+'''
+
+admission_in_flight = metrics.Gauge(
+    "admission_in_flight", "Requests running under admission control",
+    ("route",))
+admission_queue_length = metrics.Gauge(
+    "admission_queue_length", "Requests waiting for an admission slot",
+    ("route",))
+admission_wait_duration = metrics.Histogram(
+    "admission_wait_seconds", "Time spent waiting for an admission slot",
+    ("route",))
+admission_rejected = metrics.Counter(
+    "admission_rejected_total", "Requests rejected by admission control",
+    ("route", "reason"))
+
+ANONYMOUS = "anonymous"
+
+
+class AdmissionLimiter:
+    """라우트 하나의 동시 실행 슬롯과 사용자별 대기열"""
+
+    def __init__(self, route: str, max_concurrency: int, max_queue: int,
+                 max_wait_seconds: float, per_user_limit: int = 0):
+        self.route = route
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.per_user_limit = per_user_limit
+        self.running = 0
+        self.running_by_user: dict[str, int] = {}
+        self.waiting_by_user: dict[str, int] = {}
+        # 사용자 -> 대기 중인 future (도착 순)
+        self.queues: dict[str, deque] = {}
+        self.queued = 0
+        # 사용자별 마지막 배정 순번 (동률이면 오래전에 배정받은 사용자 우선)
+        self.last_granted: dict[str, int] = {}
+        self.grants = 0
+        # 슬롯 점유 시간 이동 평균 (Retry-After 추정용)
+        self.average_hold = 1.0
+        admission_in_flight.set(0, route=route)
+        admission_queue_length.set(0, route=route)
+
+    def retry_after(self) -> int:
+        """대기열이 빠지는 데 걸릴 예상 시간(초)"""
+        if self.max_concurrency <= 0:
+            return 1
+        return max(1, math.ceil(self.average_hold * (self.queued + 1)
+                                / self.max_concurrency))
+
+    def _reject(self, status_code: int, reason: str, detail: str):
+        admission_rejected.inc(route=self.route, reason=reason)
+        raise HTTPException(status_code=status_code, detail=detail,
+                            headers={"Retry-After": str(self.retry_after())})
+
+    def _update_gauges(self):
+        admission_in_flight.set(self.running, route=self.route)
+        admission_queue_length.set(self.queued, route=self.route)
+
+    def _start(self, user: str):
+        self.running += 1
+        self.running_by_user[user] = self.running_by_user.get(user, 0) + 1
+        self.grants += 1
+        self.last_granted[user] = self.grants
+
+    def _has_capacity(self) -> bool:
+        return self.max_concurrency <= 0 or \
+            self.running < self.max_concurrency
+
+    def _grant_next(self):
+        """
+        빈 슬롯을 실행 중인 요청이 가장 적은 사용자의 대기 요청에 배정
+        (같으면 가장 오래전에 배정받은 사용자, 그다음 먼저 도착한 요청)
+        """
+        while self._has_capacity() and self.queued:
+            user = min(self.queues, key=lambda u: (
+                self.running_by_user.get(u, 0), self.last_granted.get(u, 0),
+                self.queues[u][0][0]))
+            queue = self.queues[user]
+            _, future = queue.popleft()
+            if not queue:
+                del self.queues[user]
+            self.queued -= 1
+            if future.done():
+                continue
+            self._start(user)
+            future.set_result(None)
+        self._update_gauges()
+
+    def _remove_waiter(self, user: str, future: asyncio.Future):
+        queue = self.queues.get(user)
+        if queue is None:
+            return
+        for item in queue:
+            if item[1] is future:
+                queue.remove(item)
+                self.queued -= 1
+                break
+        if not queue:
+            del self.queues[user]
+            if user not in self.running_by_user:
+                self.last_granted.pop(user, None)
+
+    async def acquire(self, user: str, limit_user: bool = True):
+        in_flight = self.running_by_user.get(user, 0) + \
+            self.waiting_by_user.get(user, 0)
+        if limit_user and 0 < self.per_user_limit <= in_flight:
+            self._reject(status.HTTP_429_TOO_MANY_REQUESTS, "user_limit",
+                         "Too many concurrent requests for this user")
+
+        if self._has_capacity() and not self.queued:
+            self._start(user)
+            self._update_gauges()
+            admission_wait_duration.observe(0, route=self.route)
+            return
+        if 0 < self.max_queue <= self.queued:
+            self._reject(status.HTTP_503_SERVICE_UNAVAILABLE, "queue_full",
+                         "Server is busy, please retry later")
+
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(user, deque()).append(
+            (time.monotonic(), future))
+        self.queued += 1
+        self.waiting_by_user[user] = self.waiting_by_user.get(user, 0) + 1
+        self._update_gauges()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future),
+                                   self.max_wait_seconds or None)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self._remove_waiter(user, future)
+                self._update_gauges()
+                self._reject(status.HTTP_503_SERVICE_UNAVAILABLE, "timeout",
+                             "Server is busy, please retry later")
+            # 시간 초과 직전에 슬롯을 배정받았으면 그대로 실행
+        except asyncio.CancelledError:
+            if future.done():
+                # 배정과 연결 종료가 겹친 경우 받은 슬롯을 돌려줌
+                self.release(user)
+            else:
+                future.cancel()
+                self._remove_waiter(user, future)
+                self._update_gauges()
+            raise
+        finally:
+            self.waiting_by_user[user] -= 1
+            if not self.waiting_by_user[user]:
+                del self.waiting_by_user[user]
+            admission_wait_duration.observe(time.perf_counter() - start,
+                                            route=self.route)
+
+    def release(self, user: str, held_seconds: float | None = None):
+        if held_seconds:
+            self.average_hold = 0.8 * self.average_hold + 0.2 * held_seconds
+        self.running -= 1
+        self.running_by_user[user] -= 1
+        if not self.running_by_user[user]:
+            del self.running_by_user[user]
+            if user not in self.queues:
+                self.last_granted.pop(user, None)
+        self._grant_next()
+
+    def dependency(self, user_dependency):
+        """
+        라우트 의존성 생성. user_dependency 가 반환한 사용자 단위로 공정 분배하며
+        None(비로그인)은 하나의 익명 사용자로 묶고 사용자별 한도는 적용하지 않음
+        """
+        async def admit(user=Depends(user_dependency)):
+            key = user.username if user is not None else ANONYMOUS
+            await self.acquire(key, limit_user=user is not None)
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.release(key, time.perf_counter() - start)
+        return admit
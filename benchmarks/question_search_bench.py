@@ -0,0 +1,103 @@
+"""
+질문 키워드 검색 지연시간 벤치마크
+
+    python -m benchmarks.question_search_bench --seed 1000000
+    python -m benchmarks.question_search_bench --keyword 방송광고 --explain
+
+--seed 는 bench- 로 시작하는 질문을 generate_series 로 대량 생성한다.
+설정된 PostgreSQL(SQLALCHEMY_DATABASE_URL)에 pg_trgm 마이그레이션이
+적용되어 있어야 한다. 기본 검색어 중 3글자 이상은 trigram 인덱스 경로,
+"편성" 은 짧은 검색어 경로(정렬 인덱스 순회, 건수 상한)를 측정한다.
+--explain 은 첫 페이지 쿼리의 실행 계획을 함께 출력한다.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import event, text
+
+from db.postgres import get_async_engine, get_async_session_factory
+from domain.question import question_crud
+
+SEED_SQL = """
+INSERT INTO question (subject, content, create_date, search_text)
+SELECT 'bench-' || g || ' 방송광고 편성 문의',
+       md5(g::text) || ' 광고 판매 시스템 질문 본문 ' || g,
+       now() - (g || ' seconds')::interval,
+       'bench-' || g || ' 방송광고 편성 문의 '
+           || md5(g::text) || ' 광고 판매 시스템 질문 본문 ' || g
+FROM generate_series(1, :count) AS g
+"""
+
+
+async def seed(count: int):
+    async with get_async_engine().begin() as conn:
+        await conn.execute(text(SEED_SQL), {"count": count})
+        await conn.execute(text("ANALYZE question"))
+
+
+async def explain(db, keyword: str):
+    # get_question_list 가 마지막으로 실행한 목록 쿼리를 EXPLAIN ANALYZE
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    engine = get_async_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        await question_crud.get_question_list(db, limit=10, keyword=keyword)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = captured[-1]
+    conn = await db.connection()
+    plan = await conn.exec_driver_sql(
+        "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+    return "\n".join(row[0] for row in plan)
+
+
+async def measure(keyword: str, repeat: int, page: int,
+                  show_plan: bool = False):
+    timings = []
+    async with get_async_session_factory()() as db:
+        if show_plan:
+            print(await explain(db, keyword))
+        for _ in range(repeat):
+            start = time.perf_counter()
+            total, _, _ = await question_crud.get_question_list(
+                db, skip=page, limit=10, keyword=keyword)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "keyword": keyword,
+        "path": "trigram" if len(keyword) >= question_crud.TRIGRAM_MIN_KEYWORD
+        else "short_keyword",
+        "total": total,
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+        "max_ms": round(timings[-1], 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keyword", action="append")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--page", type=int, default=0)
+    parser.add_argument("--explain", action="store_true")
+    args = parser.parse_args()
+
+    if args.seed:
+        await seed(args.seed)
+
+    keywords = args.keyword or [
+        "방송광고", "bench-99999", "존재하지않는말", "편성"]
+    for keyword in keywords:
+        print(await measure(keyword, args.repeat, args.page, args.explain))
+    await get_async_engine().dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,519 @@
+"""
+오프라인 벤치마크 하네스
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --only search --vectors 10000 100000 1000000
+
+외부 API 없이 결정적인 가짜 임베딩 모델과 SQLite(BENCH_DATABASE_URL 을
+지정하면 해당 PostgreSQL)를 사용한다. pgvector 항목은 BENCH_PGVECTOR_URL
+(postgresql://..., vector 확장 필요)이 있을 때만 측정한다. 각 항목은 별도 프로세스에서 실행해
+최대 RSS 를 분리 측정하고, 결과를 JSON 으로 저장해 커밋 간 비교한다.
+"""
+import os
+
+# 프로젝트 모듈 import 전에 필요한 설정 기본값 지정 (접속은 하지 않음)
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", "bench:bench@localhost/bench")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import hashlib  # noqa: E402
+import json  # noqa: E402
+import multiprocessing  # noqa: E402
+import pickle  # noqa: E402
+import platform  # noqa: E402
+import resource  # noqa: E402
+import statistics  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import tempfile  # noqa: E402
+import time  # noqa: E402
+from concurrent.futures import ProcessPoolExecutor  # noqa: E402
+from datetime import datetime, timedelta  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+DIMENSION = 384
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 새 인터프리터에서 main:app import 시간과 최대 RSS 측정
+STARTUP_SCRIPT = """
+import json, resource, time
+start = time.perf_counter()
+import main
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+class FakeEmbeddings:
+    """텍스트 해시로 시드를 정하는 결정적 임베딩"""
+
+    def __init__(self, dimension: int = DIMENSION):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> list[float]:
+        seed = int.from_bytes(
+            hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(
+            self.dimension, dtype=np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _summary(timings: list[float]) -> dict:
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[max(int(len(timings) * 0.95) - 1, 0)]
+                        * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+    }
+
+
+def _random_vectors(count: int, dimension: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((count, dimension), dtype=np.float32)
+
+
+def _write_merged(path: str, count: int, dimension: int):
+    import faiss
+
+    os.makedirs(path, exist_ok=True)
+    index = faiss.IndexFlatL2(dimension)
+    index.add(_random_vectors(count, dimension))
+    faiss.write_index(index, f"{path}/merged_index.faiss")
+    with open(f"{path}/merged_metadata.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "total_vectors": count,
+            "dimension": dimension,
+            "source_mapping": [f"doc_{i // 100}.txt" for i in range(count)],
+            "chunks": [f"chunk {i}" for i in range(count)],
+            "original_files": [f"doc_{i}.txt"
+                               for i in range((count + 99) // 100)],
+        }, f, ensure_ascii=False)
+
+
+def bench_search(vectors: int, dimension: int, repeat: int) -> dict:
+    from domain.doc.document_tool import search_merged_index
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_merged(tmp, vectors, dimension)
+        queries = _random_vectors(repeat, dimension, seed=1)
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            search_merged_index(query, 5, tmp)
+            timings.append(time.perf_counter() - start)
+    return {"vectors": vectors, "dimension": dimension, **_summary(timings),
+            "peak_rss_mb": round(_peak_rss_mb(), 1)}
+
+
+def bench_merge(documents: int, chunks: int, dimension: int) -> dict:
+    from domain.doc import document_tool
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.makedirs(document_tool.METADATA_PATH)
+        os.makedirs(document_tool.VECTOR_DB_PATH)
+        for doc in range(documents):
+            embedding_file = f"{document_tool.VECTOR_DB_PATH}/{doc}.pkl"
+            with open(embedding_file, "wb") as f:
+                pickle.dump(_random_vectors(chunks, dimension, doc).tolist(),
+                            f)
+            with open(f"{document_tool.METADATA_PATH}/{doc}.json", "w",
+                      encoding="utf-8") as f:
+                json.dump({
+                    "file_path": f"doc_{doc}.txt",
+                    "chunks": [f"chunk {doc}-{i}" for i in range(chunks)],
+                    "embedding_file": embedding_file,
+                    "index_file": f"{document_tool.VECTOR_DB_PATH}/{doc}.faiss",
+                }, f)
+
+        rss_before = _peak_rss_mb()
+        start = time.perf_counter()
+        document_tool.merge_faiss_indexes(document_tool.MERGED_DB_PATH)
+        elapsed = time.perf_counter() - start
+    return {"documents": documents, "vectors": documents * chunks,
+            "dimension": dimension, "seconds": round(elapsed, 3),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "peak_rss_growth_mb": round(_peak_rss_mb() - rss_before, 1)}
+
+
+def bench_append(base_vectors: int, paragraphs: int, dimension: int) -> dict:
+    from domain.doc import document_tool
+
+    document_tool.get_embeddings = lambda: FakeEmbeddings(dimension)
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_merged(tmp, base_vectors, dimension)
+        file_path = f"{tmp}/new_document.txt"
+        with open(file_path, "w", encoding="utf-8") as f:
+            for i in range(paragraphs):
+                f.write(f"{i}번째 문단입니다. 방송광고 판매 계약 조항 {i} "
+                        * 8 + "\n\n")
+        start = time.perf_counter()
+        result = document_tool.append_to_merged_index(file_path, tmp)
+        elapsed = time.perf_counter() - start
+    return {"base_vectors": base_vectors,
+            "added_vectors": result["added_vectors"],
+            "dimension": dimension, "seconds": round(elapsed, 3),
+            "peak_rss_mb": round(_peak_rss_mb(), 1)}
+
+
+def bench_pgvector(vectors: int, dimension: int, index_type: str,
+                   repeat: int) -> dict:
+    """pgvector COPY 적재/인덱스 생성/검색 지연과 FAISS 완전 탐색 대비 recall@5"""
+    url = os.environ.get("BENCH_PGVECTOR_URL")
+    if not url:
+        return {"vectors": vectors, "index": index_type,
+                "error": "BENCH_PGVECTOR_URL not set"}
+    # models 의 vector 컬럼 차원과 검색 파라미터를 벤치마크 값으로 맞춤
+    os.environ["PGVECTOR_DIMENSION"] = str(dimension)
+    os.environ["PGVECTOR_INDEX"] = index_type
+
+    import faiss
+    from sqlalchemy import create_engine, insert, text
+    from sqlalchemy.orm import Session
+
+    import models
+    from domain.doc import document_pgvector
+
+    engine = create_engine(url)
+    tables = [models.Document.__table__, models.DocumentChunk.__table__]
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        models.Base.metadata.drop_all(conn, tables=tables)
+        models.Base.metadata.create_all(conn, tables=tables)
+        conn.execute(insert(models.Document), [{
+            "id": i + 1, "file_path": f"doc_{i}.txt",
+            "embedding_file": f"e_{i}", "index_file": f"i_{i}",
+            "unique_id": f"u_{i}", "create_date": datetime(2024, 12, 24),
+        } for i in range((vectors + 99) // 100)])
+
+    data = _random_vectors(vectors, dimension)
+    documents = []
+    file_texts, file_vectors = {}, {}
+    with Session(engine) as db:
+        for document in db.query(models.Document).order_by(
+                models.Document.id):
+            offset = (document.id - 1) * 100
+            file_texts[document.file_path] = [
+                f"chunk {i}"
+                for i in range(offset, min(offset + 100, vectors))]
+            file_vectors[document.file_path] = data[offset:offset + 100]
+            documents.append(document)
+        start = time.perf_counter()
+        document_pgvector.save_document_chunks(
+            db, "default", documents, file_texts, file_vectors)
+        copy_seconds = time.perf_counter() - start
+
+    # 운영과 같이 적재 후 인덱스 생성 (IVFFlat 리스트 수는 행 수 기준)
+    start = time.perf_counter()
+    with Session(engine) as db:
+        document_pgvector.build_vector_index(db, index_type)
+    index_seconds = time.perf_counter() - start
+
+    exact = faiss.IndexFlatL2(dimension)
+    exact.add(data)
+    queries = _random_vectors(repeat, dimension, seed=1)
+    _, expected = exact.search(queries, 5)
+    timings, hits = [], 0
+    with Session(engine) as db:
+        first_id = db.query(models.DocumentChunk.id).order_by(
+            models.DocumentChunk.id).limit(1).scalar()
+        for query, expected_ids in zip(queries, expected):
+            start = time.perf_counter()
+            results = document_pgvector.search_chunks(db, query, 5)
+            timings.append(time.perf_counter() - start)
+            hits += len({r["index"] - first_id for r in results}
+                        & set(expected_ids.tolist()))
+    engine.dispose()
+    return {"vectors": vectors, "dimension": dimension, "index": index_type,
+            "copy_rows_per_second": round(vectors / copy_seconds),
+            "index_build_seconds": round(index_seconds, 3),
+            "recall_at_5": round(hits / (len(queries) * 5), 3),
+            **_summary(timings)}
+
+
+def _write_chunking_input(file_path: str, rows: int):
+    with open(file_path, "w", encoding="utf-8") as f:
+        if file_path.endswith(".csv"):
+            f.write("id,name,description\n")
+            for i in range(rows):
+                f.write(f"{i},광고상품 {i},방송광고 판매 계약 조항 {i} 설명입니다.\n")
+            return
+        for i in range(rows):
+            f.write(f"{i}번째 문단입니다. 방송광고 판매 계약은 다음과 같다. "
+                    f"광고주는 대금을 지급한다! 편성은 어떻게 되는가? "
+                    * (1 + i % 5) + "\n\n")
+
+
+def bench_chunking(strategy: str, extension: str, rows: int) -> dict:
+    from domain.doc import document_splitter, document_tool
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = f"{tmp}/chunking{extension}"
+        _write_chunking_input(file_path, rows)
+        size_mb = os.path.getsize(file_path) / 1024 / 1024
+
+        if strategy == "legacy":
+            # 변경 전 방식: 문자 수 기준 기본 구분자, 문서 전체 로드
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=1000, chunk_overlap=200, length_function=len)
+
+            def split():
+                documents = document_tool.get_document_loader(
+                    file_path).load()
+                return [chunk.page_content for chunk in
+                        text_splitter.split_documents(documents)]
+        else:
+            document_splitter.settings.CHUNK_LENGTH_UNIT = strategy
+            document_splitter.get_length_function.cache_clear()
+            try:
+                document_splitter.get_length_function()
+            except Exception as e:
+                return {"strategy": strategy, "extension": extension,
+                        "error": f"{type(e).__name__}: {e}"}
+
+            def split():
+                return document_tool.split_document(file_path)
+
+        start = time.perf_counter()
+        chunks = split()
+        elapsed = time.perf_counter() - start
+    lengths = [len(chunk) for chunk in chunks]
+    return {"strategy": strategy, "extension": extension,
+            "input_mb": round(size_mb, 2), "chunks": len(chunks),
+            "seconds": round(elapsed, 3),
+            "mb_per_second": round(size_mb / elapsed, 2),
+            "chunks_per_second": round(len(chunks) / elapsed, 1),
+            "chunk_chars_mean": round(statistics.mean(lengths), 1),
+            "chunk_chars_stdev": round(statistics.pstdev(lengths), 1),
+            "total_chunk_chars": sum(lengths),
+            "peak_rss_mb": round(_peak_rss_mb(), 1)}
+
+
+def _bench_engine():
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.ext.compiler import compiles
+    from sqlalchemy.sql.functions import GenericFunction
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if url:
+        return create_async_engine(url)
+
+    # SQLite 에 없는 PostgreSQL 함수 대체
+    class string_agg(GenericFunction):
+        inherit_cache = True
+
+    @compiles(string_agg, "sqlite")
+    def _string_agg(element, compiler, **kw):
+        return "group_concat(%s)" % compiler.process(element.clauses, **kw)
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _functions(conn, record):
+        conn.create_function(
+            "concat_ws", -1,
+            lambda sep, *args: sep.join(a for a in args if a is not None))
+        conn.create_function(
+            "word_similarity", 2,
+            lambda keyword, text: float(keyword in (text or "")))
+    return engine
+
+
+async def _seed_questions(engine, count: int):
+    import models
+    from sqlalchemy import insert
+
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(insert(models.User), [{
+            "id": 1, "username": "bench", "email": "bench@example.com",
+            "password": "x"}])
+        now = datetime(2024, 12, 24)
+        for offset in range(0, count, 10000):
+            await conn.execute(insert(models.Question), [{
+                "subject": f"방송광고 편성 문의 {i}",
+                "content": f"광고 판매 시스템 질문 본문 {i}",
+                "create_date": now - timedelta(seconds=i),
+                "user_id": 1,
+                "search_text": f"방송광고 편성 문의 {i} 광고 판매 시스템 "
+                               f"질문 본문 {i} bench",
+            } for i in range(offset, min(offset + 10000, count))])
+
+
+def bench_question_list(questions: int, keyword: str, page: int,
+                        repeat: int) -> dict:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from domain.question import question_crud
+
+    async def run():
+        engine = _bench_engine()
+        await _seed_questions(engine, questions)
+        session = async_sessionmaker(engine, expire_on_commit=False)
+        timings = []
+        async with session() as db:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                await question_crud.get_question_list(
+                    db, skip=page, limit=10, keyword=keyword)
+                timings.append(time.perf_counter() - start)
+        await engine.dispose()
+        return timings
+
+    timings = asyncio.run(run())
+    return {"questions": questions, "keyword": keyword, "page": page,
+            "database": engine_name(), **_summary(timings)}
+
+
+def bench_login(repeat: int) -> dict:
+    from fastapi.security import OAuth2PasswordRequestForm
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from domain.user import user_crud, user_router, user_schema
+
+    async def run():
+        engine = _bench_engine()
+        await _seed_questions(engine, 0)
+        session = async_sessionmaker(engine, expire_on_commit=False)
+        timings = []
+        async with session() as db:
+            await user_crud.create_user(db, user_schema.UserCreate(
+                username="login", password1="pw", password2="pw",
+                email="login@example.com"))
+            form = OAuth2PasswordRequestForm(username="login", password="pw")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                await user_router.login_for_access_token(form, db)
+                timings.append(time.perf_counter() - start)
+        await engine.dispose()
+        return timings
+
+    return {"database": engine_name(), **_summary(asyncio.run(run()))}
+
+
+def bench_startup(features: str, repeat: int) -> dict:
+    enabled = set(filter(None, features.split(",")))
+    env = {**os.environ, **{
+        f"ENABLE_{name.upper()}": str(name in enabled).lower()
+        for name in ("chat", "documents", "sql")}}
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT], env=env, cwd=ROOT,
+            capture_output=True, text=True)
+        if completed.returncode:
+            return {"features": features,
+                    "error": completed.stderr.strip().splitlines()[-1]}
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {"features": features or "qa_only",
+            **_summary([run["seconds"] for run in runs]),
+            "peak_rss_mb": round(max(run["peak_rss_mb"] for run in runs), 1)}
+
+
+def engine_name() -> str:
+    return "postgresql" if os.environ.get("BENCH_DATABASE_URL") else "sqlite"
+
+
+def _run_isolated(func, *args) -> dict:
+    # 항목별 최대 RSS 를 분리하기 위해 새 프로세스에서 실행
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(func, *args).result()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--only", action="append",
+                        choices=["search", "merge", "append", "chunking",
+                                 "question_list", "login", "startup",
+                                 "pgvector"])
+    parser.add_argument("--vectors", type=int, nargs="+",
+                        default=[10000, 100000])
+    parser.add_argument("--dimension", type=int, default=DIMENSION)
+    parser.add_argument("--questions", type=int, default=100000)
+    parser.add_argument("--rows", type=int, default=20000,
+                        help="chunking 입력 문단/행 수")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    selected = set(args.only or ["search", "merge", "append", "chunking",
+                                 "question_list", "login", "startup",
+                                 "pgvector"])
+
+    results = []
+
+    def record(name, func, *func_args):
+        result = {"name": name, **_run_isolated(func, *func_args)}
+        print(json.dumps(result, ensure_ascii=False))
+        results.append(result)
+
+    if "search" in selected:
+        for vectors in args.vectors:
+            record("search_merged_index", bench_search,
+                   vectors, args.dimension, args.repeat)
+    if "merge" in selected:
+        for vectors in args.vectors:
+            record("merge_faiss_indexes", bench_merge,
+                   max(vectors // 100, 1), 100, args.dimension)
+    if "append" in selected:
+        record("append_to_merged_index", bench_append,
+               args.vectors[0], 200, args.dimension)
+    if "chunking" in selected:
+        for extension in (".txt", ".csv"):
+            for strategy in ("legacy", "char", "token"):
+                record("chunking", bench_chunking, strategy, extension,
+                       args.rows)
+    if "question_list" in selected:
+        for keyword in ("", "편성 문의 4242"):
+            for page in (0, 500):
+                record("question_list", bench_question_list,
+                       args.questions, keyword, page, args.repeat)
+    if "login" in selected:
+        record("login", bench_login, args.repeat)
+    if "pgvector" in selected:
+        # FAISS 경로(search_merged_index)와 같은 벡터 수/차원으로 비교
+        for vectors in args.vectors:
+            for index_type in ("hnsw", "ivfflat"):
+                record("pgvector", bench_pgvector, vectors, args.dimension,
+                       index_type, args.repeat)
+    if "startup" in selected:
+        for features in ("chat,documents,sql", "documents", ""):
+            record("startup", bench_startup, features, min(args.repeat, 10))
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True,
+            text=True).stdout.strip()
+    except OSError:
+        commit = None
+    report = {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+질문 목록 응답 직렬화 CPU 비용 비교 (DB 불필요)
+
+    python -m benchmarks.serialization_bench --size 10 --repeat 2000
+
+pydantic: ORM 객체 -> QuestionList 검증 -> model_dump_json (기본 경로)
+orjson  : 조회 행 dict -> orjson.dumps (FAST_JSON_RESPONSES 경로)
+"""
+import argparse
+import time
+from datetime import datetime
+
+import orjson
+
+from domain.question.question_schema import QuestionList
+from models import Question, User
+
+
+def make_page(size: int):
+    user = User(id=1, username="tester", email="tester@example.com")
+    questions, rows = [], []
+    for i in range(size):
+        question = Question(
+            id=i, subject=f"방송광고 편성 문의 {i}", content="본문",
+            create_date=datetime(2024, 12, 24, 10, 0, i % 60, 123456),
+            user=user, answer_count=i % 5, vote_count=i % 7)
+        questions.append(question)
+        rows.append({
+            'id': question.id,
+            'subject': question.subject,
+            'create_date': question.create_date,
+            'user': {'id': user.id, 'username': user.username,
+                     'email': user.email},
+            'modify_date': None,
+            'answer_count': question.answer_count,
+            'vote_count': question.vote_count,
+        })
+    return questions, rows
+
+
+def measure(func, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - start) / repeat * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, action="append")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    for size in args.size or [10, 50]:
+        questions, rows = make_page(size)
+        pydantic_us = measure(lambda: QuestionList.model_validate({
+            'total': 1000, 'question_list': questions, 'next_cursor': None
+        }, from_attributes=True).model_dump_json(), args.repeat)
+        orjson_us = measure(lambda: orjson.dumps({
+            'total': 1000, 'question_list': rows, 'next_cursor': None
+        }), args.repeat)
+        print({
+            "page_size": size,
+            "pydantic_us_per_request": round(pydantic_us, 1),
+            "orjson_us_per_request": round(orjson_us, 1),
+            "speedup": round(pydantic_us / orjson_us, 1),
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,21 @@
+from functools import lru_cache
 from langchain_community.utilities import SQLDatabase
 from fastapi import Depends
 from typing import Annotated
-import cx_Oracle
 from settings import get_settings
+from metrics import instrument_engine
+
+
+@lru_cache()
+def _init_oracle_client():
+    """Oracle 클라이언트 초기화 (프로세스당 한 번, 첫 요청 시 import)"""
+    import cx_Oracle
+
+    try:
+        cx_Oracle.init_oracle_client(
+            lib_dir=get_settings().ORACLE_CLIENT_DIR)
+    except Exception as e:
+        print(e)
 
 
 def get_db() -> SQLDatabase:
@@ -13,14 +26,13 @@ def get_db() -> SQLDatabase:
 {settings.DB_HOST}:{settings.DB_PORT}/\
 ?service_name={settings.DB_SERVICE}"
 
-    try:
-        cx_Oracle.init_oracle_client(lib_dir=settings.ORACLE_CLIENT_DIR)
-    except Exception as e:
-        print(e)
+    _init_oracle_client()
 
-    return SQLDatabase4Ora.from_uri(
+    db = SQLDatabase4Ora.from_uri(
         connection_string
     )
+    instrument_engine(db._engine, "oracle")
+    return db
 
 
 class SQLDatabase4Ora(SQLDatabase):
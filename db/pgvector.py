@@ -0,0 +1,78 @@
+import io
+from typing import Iterable, Sequence
+
+import numpy as np
+from sqlalchemy.types import UserDefinedType
+
+'''
+pgvector 컬럼 타입과 COPY 적재
+
+pgvector 파이썬 패키지 없이 vector 값을 '[x,y,...]' 텍스트 표현으로
+주고받는다. 대량 적재는 INSERT 대신 COPY ... FROM STDIN (텍스트 포맷)을
+배치 단위로 실행한다 (psycopg2 커넥션).
+'''
+
+
+def vector_literal(vector) -> str:
+    return "[" + ",".join(
+        map(str, np.asarray(vector, dtype=np.float32).tolist())) + "]"
+
+
+def parse_vector(value: str) -> np.ndarray:
+    return np.array(value[1:-1].split(","), dtype=np.float32)
+
+
+class Vector(UserDefinedType):
+    """pgvector vector(n) 타입"""
+    cache_ok = True
+
+    def __init__(self, dimension: int | None = None):
+        self.dimension = dimension
+
+    def get_col_spec(self, **kw):
+        if self.dimension is None:
+            return "vector"
+        return f"vector({self.dimension})"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            return None if value is None else vector_literal(value)
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            return None if value is None else parse_vector(value)
+        return process
+
+
+def _copy_text(value) -> str:
+    """COPY 텍스트 포맷 필드 (NUL 은 PostgreSQL text 에 저장할 수 없어 제거)"""
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t") \
+        .replace("\n", "\\n").replace("\r", "\\r").replace("\x00", "")
+
+
+def copy_rows(dbapi_connection, table: str, columns: Sequence[str],
+              rows: Iterable[Sequence], batch_rows: int = 5000) -> int:
+    """행을 batch_rows 개씩 COPY 로 적재하고 적재한 행 수 반환"""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    total = 0
+    buffer = io.StringIO()
+    count = 0
+    with dbapi_connection.cursor() as cursor:
+        for row in rows:
+            buffer.write("\t".join(map(_copy_text, row)))
+            buffer.write("\n")
+            count += 1
+            if count >= batch_rows:
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+                total += count
+                buffer = io.StringIO()
+                count = 0
+        if count:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            total += count
+    return total
@@ -1,17 +1,152 @@
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import asyncio
+import itertools
+import math
+import time
+from functools import lru_cache
+from fastapi import Request, Response
+from sqlalchemy import create_engine, MetaData, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from settings import get_settings
+from metrics import db_read_route, db_replica_lag, instrument_engine
 
 settings = get_settings()
 SQLALCHEMY_DATABASE_URL = settings.SQLALCHEMY_DATABASE_URL
 
-engine = create_engine("postgresql://"+SQLALCHEMY_DATABASE_URL)
-async_engine = create_async_engine(
-    "postgresql+asyncpg://"+SQLALCHEMY_DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 엔진은 처음 사용할 때 생성 (문서 기능을 쓰지 않는 워커는 동기 엔진을 만들지 않음)
+@lru_cache()
+def get_engine():
+    engine = create_engine("postgresql://"+SQLALCHEMY_DATABASE_URL)
+    instrument_engine(engine, "postgres")
+    return engine
+
+
+def _create_async_engine(url: str, database: str):
+    async_engine = create_async_engine(
+        "postgresql+asyncpg://"+url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True)
+    instrument_engine(async_engine.sync_engine, database)
+    return async_engine
+
+
+@lru_cache()
+def get_async_engine():
+    return _create_async_engine(SQLALCHEMY_DATABASE_URL, "postgres")
+
+
+@lru_cache()
+def get_session_factory():
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+@lru_cache()
+def get_async_session_factory():
+    # 커밋 이후 속성 접근 시 암묵적 IO가 일어나지 않도록 expire_on_commit 해제
+    return async_sessionmaker(bind=get_async_engine(), autoflush=False,
+                              expire_on_commit=False)
+
+
+# 복제 지연(초). 복제본이 아니거나 재생할 WAL 이 없으면 0
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+class Replica:
+    """읽기 전용 복제본과 마지막으로 측정한 복제 지연"""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = _create_async_engine(url, "postgres_replica")
+        self.session_factory = async_sessionmaker(
+            bind=self.engine, autoflush=False, expire_on_commit=False)
+        self.lag: float | None = None
+        self.checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _query_lag(self):
+        async with self.engine.connect() as conn:
+            return await conn.scalar(REPLICA_LAG_QUERY)
+
+    async def _measure_lag(self) -> float | None:
+        """복제 지연 측정 (응답이 없거나 실패하면 None)"""
+        try:
+            lag = await asyncio.wait_for(
+                self._query_lag(), settings.REPLICA_LAG_CHECK_SECONDS or None)
+        except Exception:
+            return None
+        return None if lag is None else float(lag)
+
+    async def is_fresh(self) -> bool:
+        """지연이 허용 범위인지 (측정값은 REPLICA_LAG_CHECK_SECONDS 동안 재사용)"""
+        if time.monotonic() - self.checked_at >= \
+                settings.REPLICA_LAG_CHECK_SECONDS and not self._lock.locked():
+            async with self._lock:
+                self.lag = await self._measure_lag()
+                self.checked_at = time.monotonic()
+                db_replica_lag.set(-1 if self.lag is None else self.lag,
+                                   replica=self.name)
+        return self.lag is not None and \
+            self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+
+@lru_cache()
+def get_replicas() -> tuple[Replica, ...]:
+    urls = [url.strip() for url in
+            (settings.SQLALCHEMY_REPLICA_URLS or "").split(",") if url.strip()]
+    return tuple(Replica(f"replica{i}", url) for i, url in enumerate(urls))
+
+
+_replica_order = itertools.count()
+
+# 최근에 쓴 클라이언트는 복제 지연 동안 primary 에서 읽음 (read-your-writes)
+RECENT_WRITE_COOKIE = "pybo_recent_write"
+
+
+def remember_write(request: Request, response: Response):
+    """쓰기 요청 라우터 의존성: 최근 쓰기 시각을 쿠키로 남김"""
+    if request.method in ("GET", "HEAD") or not get_replicas():
+        return
+    response.set_cookie(
+        RECENT_WRITE_COOKIE, str(time.time()),
+        max_age=math.ceil(settings.REPLICA_MAX_LAG_SECONDS),
+        httponly=True, samesite="lax")
+
+
+def _wrote_recently(request: Request) -> bool:
+    try:
+        written_at = float(request.cookies.get(RECENT_WRITE_COOKIE, ""))
+    except ValueError:
+        return False
+    return time.time() - written_at < settings.REPLICA_MAX_LAG_SECONDS
+
+
+def is_replica_session(db) -> bool:
+    return db.bind is not get_async_engine()
+
+
+async def get_read_session_factory(prefer_primary: bool = False):
+    """지연이 허용 범위인 복제본을 돌아가며 선택 (없으면 primary)"""
+    replicas = () if prefer_primary else get_replicas()
+    start = next(_replica_order)
+    for offset in range(len(replicas)):
+        replica = replicas[(start + offset) % len(replicas)]
+        if await replica.is_fresh():
+            db_read_route.inc(target=replica.name)
+            return replica.session_factory
+    db_read_route.inc(target="primary")
+    return get_async_session_factory()
+
 
 Base = declarative_base()
 naming_convention = {
@@ -25,7 +160,7 @@ Base.metadata = MetaData(naming_convention=naming_convention)
 
 
 def get_db():
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
@@ -33,7 +168,16 @@ def get_db():
 
 
 async def get_async_db():
-    db = AsyncSession(bind=async_engine)
+    db = get_async_session_factory()()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def get_async_read_db(request: Request):
+    """읽기 전용 엔드포인트용 세션 (복제본 우선, 쓰기 금지)"""
+    db = (await get_read_session_factory(_wrote_recently(request)))()
     try:
         yield db
     finally:
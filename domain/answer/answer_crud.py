@@ -1,38 +1,82 @@
 from datetime import datetime
 
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, joinedload
 
 from domain.answer.answer_schema import AnswerCreate, AnswerUpdate
-from models import Question, Answer, User
+from domain.question import question_cache
+from domain.question.question_crud import refresh_search_text
+from domain.user import user_schema
+from models import Question, Answer, answer_voter
 
 
-def create_answer(db: Session, question: Question,
-                  answer_create: AnswerCreate, user: User):
-    db_answer = Answer(question=question,
+async def create_answer(db: AsyncSession, question: Question,
+                        answer_create: AnswerCreate,
+                        user: user_schema.User):
+    db_answer = Answer(question_id=question.id,
                        content=answer_create.content,
                        create_date=datetime.now(),
-                       user=user)
+                       user_id=user.id)
     db.add(db_answer)
-    db.commit()
+    await db.flush()
+    await _add_answer_count(db, question.id, 1)
+    await refresh_search_text(db, question.id)
+    await db.commit()
+    await question_cache.publish_change(db, question.id)
 
 
-def get_answer(db: Session, answer_id: int):
-    return db.query(Answer).get(answer_id)
+async def _add_answer_count(db: AsyncSession, question_id: int, delta: int):
+    await db.execute(
+        update(Question).where(Question.id == question_id).values(
+            answer_count=Question.answer_count + delta
+        ).execution_options(synchronize_session=False))
 
 
-def update_answer(db: Session, db_answer: Answer,
-                  answer_update: AnswerUpdate):
+async def get_answer(db: AsyncSession, answer_id: int,
+                     with_relations: bool = True):
+    if not with_relations:
+        return await db.get(Answer, answer_id)
+    return await db.get(Answer, answer_id,
+                        options=(joinedload(Answer.user),
+                                 selectinload(Answer.voter)),
+                        populate_existing=True)
+
+
+async def update_answer(db: AsyncSession, db_answer: Answer,
+                        answer_update: AnswerUpdate):
     db_answer.content = answer_update.content
     db_answer.modify_date = datetime.now()
     db.add(db_answer)
-    db.commit()
+    await db.flush()
+    await refresh_search_text(db, db_answer.question_id)
+    await db.commit()
+    await question_cache.publish_change(db, db_answer.question_id)
 
 
-def delete_answer(db: Session, db_answer: Answer):
-    db.delete(db_answer)
-    db.commit()
+async def delete_answer(db: AsyncSession, db_answer: Answer):
+    await db.delete(db_answer)
+    await db.flush()
+    await _add_answer_count(db, db_answer.question_id, -1)
+    await refresh_search_text(db, db_answer.question_id)
+    await db.commit()
+    await question_cache.publish_change(db, db_answer.question_id)
 
 
-def vote_answer(db: Session, db_answer: Answer, db_user: User):
-    db_answer.voter.append(db_user)
-    db.commit()
+async def vote_answer(db: AsyncSession, db_answer: Answer,
+                      db_user: user_schema.User):
+    # 기존 추천자 목록을 로드하지 않고 중복 추천은 DB 에서 무시한다
+    result = await db.execute(
+        insert(answer_voter).values(
+            user_id=db_user.id, answer_id=db_answer.id
+        ).on_conflict_do_nothing())
+    if result.rowcount:
+        await db.execute(
+            update(Answer).where(Answer.id == db_answer.id).values(
+                vote_count=Answer.vote_count + 1
+            ).execution_options(synchronize_session=False))
+    await db.commit()
+    if result.rowcount:
+        # 중복 추천은 바뀐 데이터가 없으므로 캐시를 무효화하지 않음
+        await question_cache.publish_change(db, db_answer.question_id)
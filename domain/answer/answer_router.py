@@ -1,78 +1,83 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from domain.user.user_router import get_current_user
 
-from db.postgres import get_db
+from db.postgres import get_async_db, get_async_read_db, remember_write
 from domain.answer import answer_schema, answer_crud
 from domain.question import question_crud
-from models import User
+from domain.user.user_schema import User
 
 router = APIRouter(
-    prefix="/api/answer"
+    prefix="/api/answer",
+    dependencies=[Depends(remember_write)],
 )
 
 
 @router.post("/create/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
-def answer_create(question_id: int,
-                  _answer_create: answer_schema.AnswerCreate,
-                  db: Session = Depends(get_db),
-                  current_user: User = Depends(get_current_user)):
+async def answer_create(question_id: int,
+                        _answer_create: answer_schema.AnswerCreate,
+                        db: AsyncSession = Depends(get_async_db),
+                        current_user: User = Depends(get_current_user)):
     # create answer
-    question = question_crud.get_question(db, question_id=question_id)
+    question = await question_crud.get_question(
+        db, question_id=question_id, with_relations=False)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
-    answer_crud.create_answer(db, question=question,
-                              answer_create=_answer_create,
-                              user=current_user)
+    await answer_crud.create_answer(db, question=question,
+                                    answer_create=_answer_create,
+                                    user=current_user)
 
 
 @router.get("/detail/{answer_id}", response_model=answer_schema.Answer)
-def answer_detail(answer_id: int, db: Session = Depends(get_db)):
-    answer = answer_crud.get_answer(db, answer_id=answer_id)
+async def answer_detail(answer_id: int,
+                        db: AsyncSession = Depends(get_async_read_db)):
+    answer = await answer_crud.get_answer(db, answer_id=answer_id)
     return answer
 
 
 @router.put("/update", status_code=status.HTTP_204_NO_CONTENT)
-def answer_update(_answer_update: answer_schema.AnswerUpdate,
-                  db: Session = Depends(get_db),
-                  current_user: User = Depends(get_current_user)):
-    db_answer = answer_crud.get_answer(db, answer_id=_answer_update.answer_id)
+async def answer_update(_answer_update: answer_schema.AnswerUpdate,
+                        db: AsyncSession = Depends(get_async_db),
+                        current_user: User = Depends(get_current_user)):
+    db_answer = await answer_crud.get_answer(
+        db, answer_id=_answer_update.answer_id, with_relations=False)
 
     if not db_answer:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="데이터를 찾을 수 없습니다.")
-    if current_user.id != db_answer.user.id:
+    if current_user.id != db_answer.user_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="수정 권한이 없습니다.")
-    answer_crud.update_answer(db=db, db_answer=db_answer,
-                              answer_update=_answer_update)
+    await answer_crud.update_answer(db=db, db_answer=db_answer,
+                                    answer_update=_answer_update)
 
 
 @router.delete("/delete", status_code=status.HTTP_204_NO_CONTENT)
-def answer_delete(_answer_delete: answer_schema.AnswerDelete,
-                  db: Session = Depends(get_db),
-                  current_user: User = Depends(get_current_user)):
-    db_answer = answer_crud.get_answer(db, answer_id=_answer_delete.answer_id)
+async def answer_delete(_answer_delete: answer_schema.AnswerDelete,
+                        db: AsyncSession = Depends(get_async_db),
+                        current_user: User = Depends(get_current_user)):
+    db_answer = await answer_crud.get_answer(
+        db, answer_id=_answer_delete.answer_id)
 
     if not db_answer:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="데이터를 찾을 수 없습니다.")
-    if current_user.id != db_answer.user.id:
+    if current_user.id != db_answer.user_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="삭제 권한이 없습니다.")
-    answer_crud.delete_answer(db=db, db_answer=db_answer)
+    await answer_crud.delete_answer(db=db, db_answer=db_answer)
 
 
 @router.post("/vote", status_code=status.HTTP_204_NO_CONTENT)
-def question_vote(_answer_vote: answer_schema.AnswerVote,
-                  db: Session = Depends(get_db),
-                  current_user: User = Depends(get_current_user)):
-    db_answer = answer_crud.get_answer(
-        db, answer_id=_answer_vote.answer_id)
+async def question_vote(_answer_vote: answer_schema.AnswerVote,
+                        db: AsyncSession = Depends(get_async_db),
+                        current_user: User = Depends(get_current_user)):
+    db_answer = await answer_crud.get_answer(
+        db, answer_id=_answer_vote.answer_id, with_relations=False)
 
     if not db_answer:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="데이터를 찾을 수 없습니다.")
-    answer_crud.vote_answer(
+    await answer_crud.vote_answer(
         db, db_answer=db_answer, db_user=current_user)
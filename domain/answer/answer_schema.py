@@ -22,6 +22,7 @@ class Answer(BaseModel):
     question_id: int
     modify_date: datetime.datetime | None = None
     voter: list[User] = []
+    vote_count: int = 0
 
 
 class AnswerUpdate(AnswerCreate):
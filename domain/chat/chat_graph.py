@@ -1,19 +1,30 @@
-from typing import List
-from langchain_teddynote.models import LLMs, get_model_name
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import BaseMessage
-from langchain_core.output_parsers import StrOutputParser
+from functools import lru_cache
+from typing import TYPE_CHECKING, List
 # from starlette.config import Config
 from dotenv import load_dotenv
+from metrics import external_call_duration
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
 
 load_dotenv()
 
-# 모델 이름 설정
-MODEL_NAME = get_model_name(LLMs.GPT4)
 
+@lru_cache()
+def get_chain():
+    """프롬프트 | 모델 | 파서 체인 (첫 호출 시 langchain 을 로드하고 재사용)"""
+    from langchain_teddynote.models import LLMs, get_model_name
+    from langchain_openai import ChatOpenAI
+    from langchain_core.prompts import (
+        ChatPromptTemplate,
+        MessagesPlaceholder,
+    )
+    from langchain_core.output_parsers import StrOutputParser
+
+    from http_client import openai_client_kwargs
 
-def call_chatbot(messages: List[BaseMessage]) -> dict:
+    # 모델 이름 설정
+    model_name = get_model_name(LLMs.GPT4)
 
     # LangChain ChatOpenAI 모델을 Agent 로 변경할 수 있습니다.
     prompt = ChatPromptTemplate.from_messages(
@@ -26,6 +37,12 @@ def call_chatbot(messages: List[BaseMessage]) -> dict:
             MessagesPlaceholder(variable_name="messages"),
         ]
     )
-    model = ChatOpenAI(model=MODEL_NAME, temperature=0.6)
-    chain = prompt | model | StrOutputParser()
-    return chain.invoke({"messages": messages})
+    model = ChatOpenAI(model=model_name, temperature=0.6,
+                       **openai_client_kwargs())
+    return prompt | model | StrOutputParser()
+
+
+def call_chatbot(messages: List["BaseMessage"]) -> dict:
+    chain = get_chain()
+    with external_call_duration.time(call="chat_completion"):
+        return chain.invoke({"messages": messages})
@@ -1,17 +1,26 @@
 from fastapi import APIRouter, Depends
 
+from admission import AdmissionLimiter
 from domain.chat import chat_schema
 from domain.user.user_router import get_current_user
 from domain.chat import chat_graph
-from models import User
+from domain.user.user_schema import User
+from settings import get_settings
 
+settings = get_settings()
 
 router = APIRouter(
     prefix="/api/chat",
 )
 
+chat_admission = AdmissionLimiter(
+    "/api/chat/req", settings.CHAT_MAX_CONCURRENCY, settings.CHAT_MAX_QUEUE,
+    settings.ADMISSION_MAX_WAIT_SECONDS, settings.ADMISSION_PER_USER_LIMIT)
 
-@router.post("/req", response_model=chat_schema.ChatReply)
+
+@router.post("/req", response_model=chat_schema.ChatReply,
+             dependencies=[Depends(chat_admission.dependency(
+                 get_current_user))])
 def chat_request(_chat_sender: chat_schema.ChatSender,
                  current_user: User = Depends(get_current_user)):
     # TODO:
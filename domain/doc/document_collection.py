@@ -0,0 +1,121 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import List
+
+import numpy as np
+from fastapi import HTTPException
+
+from domain.doc.document_tool import (
+    DEFAULT_COLLECTION,
+    collection_path,
+    list_collections,
+    search_merged_index,
+)
+from settings import get_settings
+
+'''
+컬렉션(샤드) 단위 통합 인덱스 검색
+
+컬렉션마다 merged_db/<컬렉션> 에 별도의 인덱스/메타데이터를 두어 한 팀의
+큰 문서 묶음이 다른 팀의 검색과 재병합을 느리게 하지 않는다. 여러 컬렉션을
+검색하면 스레드풀에서 샤드별로 동시에 검색하고 (FAISS 검색은 GIL 을 놓음)
+거리순으로 정렬된 샤드 결과를 k-way 병합해 상위 k 개를 반환한다.
+VECTOR_STORE_BACKEND=pgvector 이면 컬렉션 조건을 붙인 한 번의 쿼리로 검색한다.
+'''
+
+settings = get_settings()
+
+# 검색 대상에 지정하면 인덱스가 있는 모든 컬렉션
+ALL_COLLECTIONS = "*"
+
+
+@lru_cache()
+def _get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=settings.COLLECTION_SEARCH_THREADS,
+        thread_name_prefix="collection-search")
+
+
+def get_collection_names() -> List[str]:
+    """검색할 수 있는 컬렉션 목록 (설정된 벡터 저장소 기준)"""
+    if settings.VECTOR_STORE_BACKEND != "pgvector":
+        return list_collections()
+
+    from db.postgres import get_session_factory
+    from domain.doc.document_pgvector import list_chunk_collections
+
+    db = get_session_factory()()
+    try:
+        return list_chunk_collections(db)
+    finally:
+        db.close()
+
+
+def resolve_collections(collections: List[str] | None) -> List[str]:
+    """검색 대상 컬렉션 이름 정리 (없으면 기본 컬렉션, * 는 전체)"""
+    if not collections:
+        return [DEFAULT_COLLECTION]
+    if ALL_COLLECTIONS in collections:
+        names = list_collections()
+        if not names:
+            raise HTTPException(status_code=404,
+                                detail="Merged index not found")
+        return names
+    names = list(dict.fromkeys(collections))
+    for name in names:
+        collection_path(name)  # 이름 검증
+    return names
+
+
+def _search_collection(collection: str, query_vector: np.ndarray,
+                       k: int) -> List[dict]:
+    try:
+        results = search_merged_index(query_vector, k,
+                                      collection_path(collection))
+    except HTTPException as e:
+        if e.status_code == 404:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Collection not found: {collection}") from e
+        raise
+    for result in results:
+        result["collection"] = collection
+    return results
+
+
+def _search_pgvector(query_vector: np.ndarray, k: int,
+                     collections: List[str] | None) -> List[dict]:
+    from db.postgres import get_session_factory
+    from domain.doc.document_pgvector import search_chunks
+
+    names = [DEFAULT_COLLECTION] if not collections else None
+    if collections and ALL_COLLECTIONS not in collections:
+        names = list(dict.fromkeys(collections))
+        for name in names:
+            collection_path(name)  # 이름 검증
+    db = get_session_factory()()
+    try:
+        return search_chunks(db, query_vector, k, names)
+    finally:
+        db.close()
+
+
+def search_collections(query_vector: np.ndarray, k: int,
+                       collections: List[str] | None = None) -> List[dict]:
+    """한 개 이상의 컬렉션에서 검색 후 거리순 상위 k 개 반환"""
+    if settings.VECTOR_STORE_BACKEND == "pgvector":
+        return _search_pgvector(query_vector, k, collections)
+
+    names = resolve_collections(collections)
+    if len(names) == 1:
+        return _search_collection(names[0], query_vector, k)
+
+    futures = [_get_executor().submit(_search_collection, name,
+                                      query_vector, k) for name in names]
+    shard_results = [future.result() for future in futures]
+    # 샤드 결과는 각각 거리 오름차순
+    return list(islice(heapq.merge(*shard_results,
+                                   key=lambda result: result["distance"]),
+                       k))
@@ -2,6 +2,7 @@ from datetime import datetime
 
 from domain.doc.document_schema import DocumentCreate
 from models import Document
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 
@@ -24,7 +25,65 @@ def create_document(db: Session, document_create: DocumentCreate):
         embedding_file=document_create.embedding_file,
         index_file=document_create.index_file,
         unique_id=document_create.unique_id,
+        content_hash=document_create.content_hash,
+        collection=document_create.collection,
         create_date=datetime.now()
     )
     db.add(db_document)
     db.commit()
+
+
+def _get_documents_in(db: Session, column, values: list) -> list[Document]:
+    """IN 조건 조회 (목록은 1000개 단위로 분할)"""
+    documents = []
+    for i in range(0, len(values), 1000):
+        documents.extend(db.query(Document).filter(
+            column.in_(values[i:i + 1000])).all())
+    return documents
+
+
+def get_documents_by_paths(db: Session,
+                           file_paths: list[str]) -> dict[str, Document]:
+    return {document.file_path: document for document in
+            _get_documents_in(db, Document.file_path, file_paths)}
+
+
+def get_documents_by_hashes(db: Session,
+                            content_hashes: list[str]) -> dict[str, Document]:
+    return {document.content_hash: document for document in
+            _get_documents_in(db, Document.content_hash, content_hashes)}
+
+
+def save_documents(db: Session, document_creates: list[DocumentCreate],
+                   existing: dict[str, Document], commit: bool = True):
+    """
+    문서 메타데이터 일괄 저장 (단일 커밋)
+    기존 경로의 문서는 갱신하고 나머지는 한 번의 INSERT 로 등록
+    commit=False 이면 호출한 쪽의 트랜잭션에 포함 (커밋은 호출한 쪽에서)
+    """
+    create_date = datetime.now()
+    new_documents = []
+    for document_create in document_creates:
+        db_document = existing.get(document_create.file_path)
+        if db_document is None:
+            new_documents.append({
+                "file_path": document_create.file_path,
+                "embedding_file": document_create.embedding_file,
+                "index_file": document_create.index_file,
+                "unique_id": document_create.unique_id,
+                "content_hash": document_create.content_hash,
+                "collection": document_create.collection,
+                "create_date": document_create.create_date or create_date,
+            })
+            continue
+        db_document.embedding_file = document_create.embedding_file
+        db_document.index_file = document_create.index_file
+        db_document.unique_id = document_create.unique_id
+        db_document.content_hash = document_create.content_hash
+        db_document.collection = document_create.collection
+    if new_documents:
+        db.execute(insert(Document), new_documents)
+    if commit:
+        db.commit()
+    else:
+        db.flush()
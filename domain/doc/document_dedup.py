@@ -0,0 +1,233 @@
+import hashlib
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from settings import get_settings
+
+'''
+통합 인덱스 청크 중복 제거
+
+공백을 정규화한 텍스트 해시로 완전 중복을, 64비트 SimHash(문자 5-gram)의
+해밍 거리로 유사 중복을 찾는다. 중복 청크는 벡터를 하나만 두고
+source_mapping 에 출처 목록(문서가 여러 번 참조하면 여러 번)을 쌓는다.
+SimHash 는 (허용 거리 + 1) 개 밴드로 나눠 색인하므로, 허용 거리 이내의
+후보는 적어도 한 밴드가 일치한다 (비둘기집 원리).
+
+반영할 때마다 통합 메타데이터 전체를 읽고 쓰므로 색인도 반영마다 다시
+만든다 (청크 수 N 에 대해 O(N log N), numpy 정렬). 새 청크 조회만 N 과
+무관하다.
+'''
+
+settings = get_settings()
+
+SHINGLE_SIZE = 5
+_MULTIPLIER = np.uint64(1000003)
+_BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 마무리 단계 (비트를 고르게 섞음)"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def simhash(text: str) -> int:
+    """문자 5-gram 기반 64비트 SimHash (프로세스와 무관하게 같은 값)"""
+    codes = np.frombuffer(normalize_text(text).encode("utf-32-le"),
+                          dtype=np.uint32).astype(np.uint64)
+    if not len(codes):
+        return 0
+    count = max(len(codes) - SHINGLE_SIZE + 1, 1)
+    shingles = np.zeros(count, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(min(SHINGLE_SIZE, len(codes))):
+            shingles = shingles * _MULTIPLIER + codes[offset:offset + count]
+        shingles = _mix(shingles)
+    ones = ((shingles[:, None] >> _BIT_POSITIONS) & np.uint64(1)).sum(axis=0)
+    value = 0
+    for bit in np.flatnonzero(ones * 2 > count):
+        value |= 1 << int(bit)
+    return value
+
+
+def normalize_merged_metadata(metadata: dict) -> dict:
+    """이전 형식(출처 문자열, 해시 없음) 통합 메타데이터를 현재 형식으로 변환"""
+    metadata["source_mapping"] = [
+        [sources] if isinstance(sources, str) else sources
+        for sources in metadata["source_mapping"]]
+    if len(metadata.get("chunk_hashes", [])) != len(metadata["chunks"]):
+        metadata["chunk_hashes"] = [text_hash(chunk)
+                                    for chunk in metadata["chunks"]]
+        metadata["chunk_simhashes"] = [simhash(chunk)
+                                       for chunk in metadata["chunks"]]
+    metadata["total_vectors"] = len(metadata["chunks"])
+    metadata["total_chunks"] = sum(
+        len(sources) for sources in metadata["source_mapping"])
+    return metadata
+
+
+def remove_sources(metadata: dict, replaced_sources: set) -> List[int]:
+    """
+    출처 목록에서 교체 대상 문서를 제거하고, 출처가 모두 사라진
+    벡터 위치를 반환 (해당 청크는 메타데이터에서도 삭제)
+    """
+    removed = []
+    kept = []
+    for i, sources in enumerate(metadata["source_mapping"]):
+        if not replaced_sources.intersection(sources):
+            kept.append(i)
+            continue
+        remaining = [s for s in sources if s not in replaced_sources]
+        metadata["total_chunks"] -= len(sources) - len(remaining)
+        metadata["source_mapping"][i] = remaining
+        if remaining:
+            kept.append(i)
+        else:
+            removed.append(i)
+    if removed:
+        for key in ("chunks", "source_mapping", "chunk_hashes",
+                    "chunk_simhashes"):
+            metadata[key] = [metadata[key][i] for i in kept]
+        metadata["total_vectors"] = len(metadata["chunks"])
+    return removed
+
+
+class ChunkDeduplicator:
+    """
+    통합 메타데이터의 청크에 대한 완전/유사 중복 탐지 및 추가
+    기존 청크의 밴드 색인은 밴드별 정렬 배열(numpy)로 한 번에 만들고,
+    이번 반영에서 추가한 청크만 dict 로 색인한다
+    """
+
+    def __init__(self, metadata: dict):
+        self.metadata = metadata
+        self.enabled = settings.DEDUP_CHUNKS
+        self.max_distance = settings.DEDUP_SIMHASH_DISTANCE
+        self.min_chars = settings.DEDUP_MIN_CHARS
+        self.band_count = self.max_distance + 1
+        self.band_width = 64 // self.band_count
+        self.stats = {"exact_duplicates": 0, "near_duplicates": 0}
+        self._build()
+
+    def _build(self):
+        hashes = self.metadata["chunk_hashes"]
+        count = len(hashes)
+        # 같은 해시가 여러 번 있으면 처음 위치가 남도록 뒤에서부터 채움
+        self.exact: dict[str, int] = dict(
+            zip(reversed(hashes), range(count - 1, -1, -1)))
+        self.added_bands: List[dict] = [{} for _ in range(self.band_count)]
+        # 밴드별 (정렬된 키, 키 순서의 위치) - 같은 키는 위치 오름차순
+        self.sorted_bands: List[Tuple[np.ndarray, np.ndarray]] = []
+        if self.max_distance <= 0:
+            return
+        lengths = np.fromiter(map(len, self.metadata["chunks"]),
+                              dtype=np.int64, count=count)
+        positions = np.flatnonzero(lengths >= self.min_chars)
+        simhashes = np.array(self.metadata["chunk_simhashes"],
+                             dtype=np.uint64).reshape(-1)[positions]
+        for keys in self._band_key_arrays(simhashes):
+            order = np.argsort(keys, kind="stable")
+            self.sorted_bands.append((keys[order], positions[order]))
+
+    def _band_key_arrays(self, values: np.ndarray) -> List[np.ndarray]:
+        mask = np.uint64((1 << self.band_width) - 1)
+        return [(values >> np.uint64(band * self.band_width)) & mask
+                for band in range(self.band_count)]
+
+    def _band_keys(self, value: int) -> Iterable[Tuple[int, int]]:
+        mask = (1 << self.band_width) - 1
+        for band in range(self.band_count):
+            yield band, (value >> (band * self.band_width)) & mask
+
+    def _index(self, position: int, chunk: str, chunk_text_hash: str,
+               chunk_simhash: int):
+        self.exact.setdefault(chunk_text_hash, position)
+        if self.max_distance > 0 and len(chunk) >= self.min_chars:
+            for band, key in self._band_keys(chunk_simhash):
+                self.added_bands[band].setdefault(key, []).append(position)
+
+    def _band_candidates(self, band: int, key: int) -> Iterable[int]:
+        sorted_keys, positions = self.sorted_bands[band]
+        start = np.searchsorted(sorted_keys, np.uint64(key), side="left")
+        end = np.searchsorted(sorted_keys, np.uint64(key), side="right")
+        yield from positions[start:end].tolist()
+        yield from self.added_bands[band].get(key, ())
+
+    def _find(self, chunk: str, chunk_text_hash: str,
+              chunk_simhash: int) -> int | None:
+        position = self.exact.get(chunk_text_hash)
+        if position is not None:
+            self.stats["exact_duplicates"] += 1
+            return position
+        if self.max_distance <= 0 or len(chunk) < self.min_chars:
+            return None
+        candidates = self.metadata["chunk_simhashes"]
+        for band, key in self._band_keys(chunk_simhash):
+            for position in self._band_candidates(band, key):
+                if (candidates[position] ^ chunk_simhash).bit_count() \
+                        <= self.max_distance:
+                    self.stats["near_duplicates"] += 1
+                    return position
+        return None
+
+    def remove(self, removed: List[int], total: int):
+        """
+        remove_sources 로 삭제된 위치를 색인에서 빼고 남은 위치를 당김
+        (total 은 삭제 전 청크 수, 정렬 배열은 다시 정렬하지 않는다)
+        """
+        keep = np.ones(total, dtype=bool)
+        keep[removed] = False
+        new_positions = np.cumsum(keep) - 1
+        self.exact = dict(zip(reversed(self.metadata["chunk_hashes"]),
+                              range(len(self.metadata["chunk_hashes"]) - 1,
+                                    -1, -1)))
+        self.sorted_bands = [
+            (sorted_keys[keep[positions]],
+             new_positions[positions[keep[positions]]])
+            for sorted_keys, positions in self.sorted_bands]
+        self.added_bands = [
+            {key: [int(new_positions[p]) for p in positions if keep[p]]
+             for key, positions in band.items()}
+            for band in self.added_bands]
+
+    def add(self, chunk: str, source: str) -> bool:
+        """청크 추가. 새 벡터가 필요하면 True, 기존 청크에 출처만 붙으면 False"""
+        chunk_text_hash = text_hash(chunk)
+        chunk_simhash = simhash(chunk)
+        self.metadata["total_chunks"] += 1
+        if self.enabled:
+            position = self._find(chunk, chunk_text_hash, chunk_simhash)
+            if position is not None:
+                self.metadata["source_mapping"][position].append(source)
+                return False
+
+        position = len(self.metadata["chunks"])
+        self.metadata["chunks"].append(chunk)
+        self.metadata["source_mapping"].append([source])
+        self.metadata["chunk_hashes"].append(chunk_text_hash)
+        self.metadata["chunk_simhashes"].append(chunk_simhash)
+        self.metadata["total_vectors"] += 1
+        self._index(position, chunk, chunk_text_hash, chunk_simhash)
+        return True
+
+
+def dedup_summary(metadata: dict, dimension: int) -> dict:
+    """중복 제거로 절약한 벡터 수/바이트"""
+    saved_vectors = metadata["total_chunks"] - metadata["total_vectors"]
+    return {
+        "total_chunks": metadata["total_chunks"],
+        "deduplicated_chunks": saved_vectors,
+        "saved_bytes": saved_vectors * dimension * 4,
+    }
@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List
+
+from fastapi import HTTPException
+
+from settings import get_settings
+
+'''
+임베딩 백엔드 선택
+
+EMBEDDING_BACKEND=openai 이면 OpenAIEmbeddings(공유 HTTP 클라이언트), local 이면
+sentence-transformers 모델을 CPU 에서 배치 단위로 실행한다.
+두 백엔드 모두 embed_documents / embed_query 인터페이스를 따른다.
+'''
+
+settings = get_settings()
+
+# 로컬 모델 기본값 (한국어 문장 임베딩)
+DEFAULT_LOCAL_MODEL = "jhgan/ko-sroberta-multitask"
+
+
+class LocalEmbeddings:
+    """sentence-transformers 기반 로컬 임베딩"""
+
+    def __init__(self, model_name: str, device: str = "cpu",
+                 runtime: str = "torch", batch_size: int = 64,
+                 threads: int = 4):
+        # 무거운 의존성이므로 local 백엔드를 사용할 때만 import
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device=device,
+                                         backend=runtime)
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(
+            texts, batch_size=self.batch_size,
+            normalize_embeddings=True, convert_to_numpy=True).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # 배치 단위로 나눠 스레드풀에서 병렬 추론 (추론 중 GIL 해제)
+        batches = [texts[i:i + self.batch_size]
+                   for i in range(0, len(texts), self.batch_size)]
+        vectors = []
+        for batch_vectors in self.executor.map(self._encode, batches):
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+
+@lru_cache()
+def get_embeddings():
+    """설정된 임베딩 백엔드 인스턴스 반환 (프로세스당 1개)"""
+    if settings.EMBEDDING_BACKEND == "local":
+        return LocalEmbeddings(
+            settings.EMBEDDING_MODEL or DEFAULT_LOCAL_MODEL,
+            device=settings.EMBEDDING_DEVICE,
+            runtime=settings.EMBEDDING_LOCAL_RUNTIME,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            threads=settings.EMBEDDING_THREADS,
+        )
+    if settings.EMBEDDING_BACKEND != "openai":
+        raise ValueError(
+            f"Unsupported embedding backend: {settings.EMBEDDING_BACKEND}")
+
+    from langchain_openai.embeddings import OpenAIEmbeddings
+
+    from http_client import openai_client_kwargs
+
+    if settings.EMBEDDING_MODEL:
+        return OpenAIEmbeddings(model=settings.EMBEDDING_MODEL,
+                                **openai_client_kwargs())
+    return OpenAIEmbeddings(**openai_client_kwargs())
+
+
+def check_dimension(vector_dimension: int, index_dimension: int):
+    """임베딩 차원과 기존 인덱스 차원이 다르면 409 반환"""
+    if vector_dimension != index_dimension:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Embedding dimension {vector_dimension} does not match "
+                   f"index dimension {index_dimension}. The index was built "
+                   f"with a different embedding backend "
+                   f"(EMBEDDING_BACKEND={settings.EMBEDDING_BACKEND})."
+        )
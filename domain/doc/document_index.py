@@ -0,0 +1,333 @@
+import json
+import mmap
+import os
+import pickle
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import faiss
+import numpy as np
+
+from domain.doc.document_dedup import normalize_merged_metadata
+from settings import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: 파일 잠금 없이 동작
+    fcntl = None
+
+'''
+통합 인덱스 공유 읽기
+
+uvicorn 워커들이 merged_db 의 인덱스와 청크 데이터를 읽기 전용 mmap 으로 열어
+페이지 캐시를 공유한다 (워커 수만큼 메모리가 늘지 않음). 쓰기 쪽은 모든 파일을
+임시 경로에 쓴 뒤 rename 으로 교체하고 generation 파일을 증가시키며,
+워커는 검색할 때 generation 이 바뀌었으면 새 파일을 다시 연다.
+
+쓰기는 프로세스 간 단일 writer 다. 각 업로드는 반영할 벡터를 pending 디렉토리에
+기록한 뒤 writer 잠금을 기다리고, 잠금을 얻은 쪽이 그때까지 쌓인 모든 배치를
+한 번의 인덱스 갱신/메타데이터 쓰기로 반영한다 (group commit). 자신의 배치가
+이미 다른 writer 에 의해 반영되었으면 결과(.done)만 읽고 돌아간다.
+반영에 실패한 배치는 오류 결과를 남기고 pending/failed 로 옮겨 이후 커밋을
+막지 않는다. 배치를 올린 프로세스가 결과를 읽지 못하고 끝나 남은 .done 과
+failed 배치는 MERGE_RESULT_TTL_SECONDS 가 지나면 다음 writer 가 지운다.
+
+청크 텍스트는 merged_chunks.bin (UTF-8 연결) + merged_chunk_offsets.npy,
+벡터별 출처 목록(중복 제거된 청크는 여러 개)은 merged_sources.json (고유 경로)
++ merged_source_offsets.npy / merged_source_ids.npy 로 저장한다.
+'''
+
+INDEX_FILE = "merged_index.faiss"
+METADATA_FILE = "merged_metadata.json"
+CHUNK_TEXT_FILE = "merged_chunks.bin"
+CHUNK_OFFSET_FILE = "merged_chunk_offsets.npy"
+SOURCE_OFFSET_FILE = "merged_source_offsets.npy"
+SOURCE_ID_FILE = "merged_source_ids.npy"
+SOURCE_FILE = "merged_sources.json"
+GENERATION_FILE = "generation"
+LOCK_FILE = ".lock"
+WRITER_LOCK_FILE = ".writer.lock"
+PENDING_DIR = "pending"
+# 반영에 실패한 배치 보관 (다음 writer 가 다시 반영하지 않음)
+FAILED_DIR = os.path.join(PENDING_DIR, "failed")
+
+settings = get_settings()
+
+# 평면 인덱스 코드까지 mmap (구버전 faiss 는 IO_FLAG_MMAP)
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) \
+    | faiss.IO_FLAG_READ_ONLY
+
+
+@contextmanager
+def _flock(merged_db_path: str, name: str, exclusive: bool):
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(merged_db_path, exist_ok=True)
+    with open(os.path.join(merged_db_path, name), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def merged_index_lock(merged_db_path: str, exclusive: bool = False):
+    """파일 교체는 배타 잠금, 파일 열기는 공유 잠금 (섞인 파일 방지)"""
+    return _flock(merged_db_path, LOCK_FILE, exclusive)
+
+
+def merged_writer_lock(merged_db_path: str):
+    """통합 인덱스 read-modify-write 전체를 감싸는 단일 writer 잠금"""
+    return _flock(merged_db_path, WRITER_LOCK_FILE, True)
+
+
+def _pending_path(merged_db_path: str, batch_id: str, suffix: str) -> str:
+    return os.path.join(merged_db_path, PENDING_DIR, batch_id + suffix)
+
+
+def enqueue_pending(merged_db_path: str, batch: dict) -> str:
+    """반영할 배치를 pending 디렉토리에 기록하고 ID 반환 (이름순 = 도착순)"""
+    os.makedirs(os.path.join(merged_db_path, PENDING_DIR), exist_ok=True)
+    batch_id = f"{time.time_ns():020d}-{uuid.uuid4().hex}"
+    path = _pending_path(merged_db_path, batch_id, ".pkl")
+    with open(f"{path}.tmp", "wb") as f:
+        pickle.dump(batch, f)
+    os.replace(f"{path}.tmp", path)
+    return batch_id
+
+
+def list_pending(merged_db_path: str) -> list[str]:
+    try:
+        names = os.listdir(os.path.join(merged_db_path, PENDING_DIR))
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-len(".pkl")] for name in names
+                  if name.endswith(".pkl"))
+
+
+def load_pending(merged_db_path: str, batch_id: str) -> dict:
+    with open(_pending_path(merged_db_path, batch_id, ".pkl"), "rb") as f:
+        return pickle.load(f)
+
+
+def finish_pending(merged_db_path: str, batch_id: str, result: dict):
+    """배치 반영 결과를 남기고 pending 데이터 삭제"""
+    with open(_pending_path(merged_db_path, batch_id, ".done"), "w",
+              encoding="utf-8") as f:
+        json.dump(result, f)
+    os.remove(_pending_path(merged_db_path, batch_id, ".pkl"))
+
+
+def fail_pending(merged_db_path: str, batch_id: str, result: dict):
+    """실패 결과를 남기고 pending 데이터를 failed 디렉토리로 옮김"""
+    os.makedirs(os.path.join(merged_db_path, FAILED_DIR), exist_ok=True)
+    with open(_pending_path(merged_db_path, batch_id, ".done"), "w",
+              encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(_pending_path(merged_db_path, batch_id, ".pkl"),
+               os.path.join(merged_db_path, FAILED_DIR, batch_id + ".pkl"))
+
+
+def pop_result(merged_db_path: str, batch_id: str) -> dict | None:
+    """반영된 배치의 결과를 읽고 삭제 (아직 반영 전이면 None)"""
+    path = _pending_path(merged_db_path, batch_id, ".done")
+    try:
+        with open(path, encoding="utf-8") as f:
+            result = json.load(f)
+    except FileNotFoundError:
+        return None
+    os.remove(path)
+    return result
+
+
+def remove_expired_results(merged_db_path: str):
+    """
+    결과를 가져갈 프로세스가 없어 남은 .done 과 failed 배치 삭제
+    (writer 잠금 안에서 호출, 수정 시각이 TTL 보다 오래된 것만)
+    """
+    expires = time.time() - settings.MERGE_RESULT_TTL_SECONDS
+    for directory, suffix in ((PENDING_DIR, ".done"), (FAILED_DIR, ".pkl")):
+        try:
+            entries = list(os.scandir(os.path.join(merged_db_path,
+                                                   directory)))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if not entry.name.endswith(suffix) or not entry.is_file():
+                continue
+            try:
+                if entry.stat().st_mtime < expires:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                # 결과를 기다리던 프로세스가 먼저 가져감
+                pass
+
+
+def read_generation(merged_db_path: str) -> int:
+    try:
+        with open(os.path.join(merged_db_path, GENERATION_FILE)) as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_tmp(path: str, write) -> str:
+    """임시 파일에 기록 (rename 후에도 열려 있는 mmap 은 이전 파일을 본다)"""
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    return tmp_path
+
+
+def publish_merged_index(merged_db_path: str, index, metadata: dict):
+    """통합 인덱스/메타데이터/청크 저장소를 교체하고 generation 증가"""
+    chunks = [chunk.encode("utf-8") for chunk in metadata["chunks"]]
+    offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+
+    # 벡터별 출처 목록을 CSR 형태(offsets + 평탄화된 ID)로 저장
+    sources = list(dict.fromkeys(
+        source for vector_sources in metadata["source_mapping"]
+        for source in vector_sources))
+    source_index = {source: i for i, source in enumerate(sources)}
+    source_ids = np.array([source_index[source]
+                           for vector_sources in metadata["source_mapping"]
+                           for source in vector_sources], dtype=np.int32)
+    source_offsets = np.zeros(len(metadata["source_mapping"]) + 1,
+                              dtype=np.int64)
+    np.cumsum([len(vector_sources)
+               for vector_sources in metadata["source_mapping"]],
+              out=source_offsets[1:])
+
+    def write_bytes(data: bytes):
+        def write(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        return write
+
+    def write_npy(array: np.ndarray):
+        def write(path):
+            with open(path, "wb") as f:
+                np.save(f, array)
+        return write
+
+    def write_json(data):
+        def write(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        return write
+
+    with merged_index_lock(merged_db_path, exclusive=True):
+        # 모든 파일을 먼저 쓰고 (실패 시 기존 파일 유지) 마지막에 한꺼번에 교체
+        writes = {
+            INDEX_FILE: lambda path: faiss.write_index(index, path),
+            METADATA_FILE: write_json(metadata),
+            CHUNK_TEXT_FILE: write_bytes(b"".join(chunks)),
+            CHUNK_OFFSET_FILE: write_npy(offsets),
+            SOURCE_OFFSET_FILE: write_npy(source_offsets),
+            SOURCE_ID_FILE: write_npy(source_ids),
+            SOURCE_FILE: write_json(sources),
+            GENERATION_FILE: write_bytes(
+                str(read_generation(merged_db_path) + 1).encode()),
+        }
+        tmp_paths = {}
+        try:
+            for name, write in writes.items():
+                tmp_paths[name] = _write_tmp(
+                    os.path.join(merged_db_path, name), write)
+        except Exception:
+            for tmp_path in tmp_paths.values():
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            raise
+        for name, tmp_path in tmp_paths.items():
+            os.replace(tmp_path, os.path.join(merged_db_path, name))
+
+
+@dataclass
+class MergedIndexSnapshot:
+    """특정 generation 의 읽기 전용 인덱스와 청크 데이터"""
+    generation: int
+    index: faiss.Index
+    offsets: np.ndarray
+    chunk_data: mmap.mmap | bytes
+    source_offsets: np.ndarray
+    source_ids: np.ndarray
+    sources: list
+
+    def chunk(self, i: int) -> str:
+        return self.chunk_data[self.offsets[i]:self.offsets[i + 1]].decode(
+            "utf-8")
+
+    def sources_of(self, i: int) -> list[str]:
+        return [self.sources[source_id] for source_id in
+                self.source_ids[self.source_offsets[i]:
+                                self.source_offsets[i + 1]]]
+
+
+def _open_snapshot(merged_db_path: str) -> MergedIndexSnapshot:
+    def path(name):
+        return os.path.join(merged_db_path, name)
+
+    with merged_index_lock(merged_db_path):
+        generation = read_generation(merged_db_path)
+        index = faiss.read_index(path(INDEX_FILE), MMAP_FLAGS)
+        offsets = np.load(path(CHUNK_OFFSET_FILE), mmap_mode="r")
+        source_offsets = np.load(path(SOURCE_OFFSET_FILE), mmap_mode="r")
+        source_ids = np.load(path(SOURCE_ID_FILE), mmap_mode="r")
+        with open(path(SOURCE_FILE), encoding="utf-8") as f:
+            sources = json.load(f)
+        with open(path(CHUNK_TEXT_FILE), "rb") as f:
+            # 빈 파일은 mmap 할 수 없음
+            chunk_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) \
+                if os.fstat(f.fileno()).st_size else b""
+    return MergedIndexSnapshot(generation, index, offsets, chunk_data,
+                               source_offsets, source_ids, sources)
+
+
+def _is_legacy(merged_db_path: str) -> bool:
+    return not all(os.path.exists(os.path.join(merged_db_path, name))
+                   for name in (CHUNK_TEXT_FILE, SOURCE_OFFSET_FILE))
+
+
+def _migrate_legacy(merged_db_path: str):
+    """
+    청크 저장소가 없는 이전 형식 merged_db 를 한 번 변환
+    writer 잠금 안에서 다시 확인해 다른 writer 의 반영을 덮어쓰지 않음
+    """
+    with merged_writer_lock(merged_db_path):
+        if not _is_legacy(merged_db_path):
+            return
+        index = faiss.read_index(os.path.join(merged_db_path, INDEX_FILE))
+        with open(os.path.join(merged_db_path, METADATA_FILE),
+                  encoding="utf-8") as f:
+            metadata = normalize_merged_metadata(json.load(f))
+        publish_merged_index(merged_db_path, index, metadata)
+
+
+_snapshots: dict[str, MergedIndexSnapshot] = {}
+_snapshot_lock = threading.Lock()
+
+
+def get_merged_index(merged_db_path: str) -> MergedIndexSnapshot:
+    """
+    워커 프로세스의 현재 스냅샷 (generation 이 바뀌면 다시 연다)
+    "merged_db", "./merged_db/" 처럼 표기만 다른 경로는 같은 스냅샷을 쓴다
+    """
+    merged_db_path = os.path.realpath(merged_db_path)
+    generation = read_generation(merged_db_path)
+    snapshot = _snapshots.get(merged_db_path)
+    if snapshot is not None and snapshot.generation == generation:
+        return snapshot
+    with _snapshot_lock:
+        snapshot = _snapshots.get(merged_db_path)
+        if snapshot is not None and \
+                snapshot.generation == read_generation(merged_db_path):
+            return snapshot
+        if _is_legacy(merged_db_path):
+            _migrate_legacy(merged_db_path)
+        snapshot = _snapshots[merged_db_path] = _open_snapshot(merged_db_path)
+    return snapshot
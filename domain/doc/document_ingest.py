@@ -0,0 +1,414 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from domain.doc.document_crud import (
+    get_documents_by_hashes,
+    get_documents_by_paths,
+    save_documents,
+)
+from domain.doc.document_embedding import get_embeddings
+from domain.doc.document_schema import DocumentMetadata
+from domain.doc.document_index import INDEX_FILE
+from domain.doc.document_tool import (
+    DEFAULT_COLLECTION,
+    SUPPORTED_EXTENSIONS,
+    chunk_hash,
+    collection_path,
+    commit_to_merged_index,
+    file_content_hash,
+    load_document_vectors,
+    remove_document_files,
+    save_document_vectors,
+    split_document,
+)
+from metrics import external_call_duration
+from settings import get_settings
+
+'''
+디렉토리/glob 단위 문서 일괄 처리
+
+    python -m domain.doc.document_ingest ./archive --workers 8 --collection sales
+
+파일 내용 해시로 변경 여부를 먼저 확인하고, 파싱/분할은 프로세스 풀에서
+병렬로 수행한다. 끝난 파일의 새 청크는 배치 크기만큼 모일 때마다 임베딩하며
+(파싱과 임베딩이 겹쳐 진행), 임베딩이 끝난 파일은 INGEST_COMMIT_FILES 개씩
+통합 인덱스와 DB 에 반영하고 메모리에서 내린다 (벡터는 파일별 float32 배열).
+'''
+
+settings = get_settings()
+
+
+def _within(root: str, file_path: str) -> bool:
+    # 심볼릭 링크와 .. 를 풀어 실제 경로로 비교
+    return os.path.commonpath(
+        [root, os.path.realpath(file_path)]) == root
+
+
+def collect_files(path: str, root: str | None = None) -> List[str]:
+    """
+    디렉토리(하위 포함) 또는 glob 패턴에서 지원 형식 파일 목록 반환
+    root 를 지정하면 path 는 root 기준이고 root 밖의 파일은 제외한다
+    """
+    if root is not None:
+        root = os.path.realpath(root)
+        path = os.path.join(root, path)
+    pattern = os.path.join(path, "**", "*") if os.path.isdir(path) else path
+    return sorted(
+        file_path for file_path in glob.glob(pattern, recursive=True)
+        if os.path.isfile(file_path)
+        and Path(file_path).suffix.lower() in SUPPORTED_EXTENSIONS
+        and (root is None or _within(root, file_path))
+    )
+
+
+def _split(file_path: str) -> Tuple[str, List[str], str | None]:
+    """프로세스 풀 작업: (파일 경로, 청크 목록, 에러 메시지)"""
+    try:
+        return file_path, split_document(file_path), None
+    except Exception as e:
+        return file_path, [], str(e) or type(e).__name__
+
+
+def _hash(file_path: str) -> str | None:
+    try:
+        return file_content_hash(file_path)
+    except OSError:
+        return None
+
+
+@contextmanager
+def _executor(workers: int):
+    """workers <= 0 이면 프로세스 풀 없이 현재 프로세스에서 실행"""
+    if workers <= 0:
+        yield None
+        return
+    # 서버 스레드에서 fork 하지 않도록 spawn 사용
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")) as executor:
+        yield executor
+
+
+def _iter_split(executor, file_paths: List[str]
+                ) -> Iterator[Tuple[str, List[str], str | None]]:
+    """완료된 순서대로 분할 결과 반환"""
+    if executor is None:
+        yield from map(_split, file_paths)
+        return
+    futures = [executor.submit(_split, file_path)
+               for file_path in file_paths]
+    for future in as_completed(futures):
+        yield future.result()
+
+
+def _previous_vectors(document) -> dict[str, list]:
+    """기존 문서의 청크 해시 -> 벡터 (없으면 빈 dict)"""
+    try:
+        metadata, vectors = load_document_vectors(document.unique_id)
+    except (OSError, ValueError):
+        return {}
+    return {chunk_hash(text): vector
+            for text, vector in zip(metadata.chunks, vectors)}
+
+
+def _commit_files(db: Session, collection: str, merged_db_path: str,
+                  processed: List[str], file_texts: dict[str, List[str]],
+                  file_vectors: dict[str, np.ndarray],
+                  hashes: dict[str, str],
+                  existing: dict) -> dict:
+    """
+    처리된 파일을 문서별 파일/통합 인덱스/DB 에 반영
+    인덱스 반영이 끝난 뒤에 DB 를 커밋하고 이전 문서 파일을 지운다
+    (실패하면 새로 쓴 파일을 지우고 DB 를 롤백해 다음 실행에서 다시 처리)
+    """
+    # save_documents 가 갱신하기 전의 이전 문서 파일과 컬렉션
+    replaced = {path: (existing[path].embedding_file,
+                       existing[path].index_file, existing[path].unique_id,
+                       existing[path].collection)
+                for path in processed if path in existing}
+    document_creates = []
+    try:
+        all_texts, all_sources = [], []
+        for file_path in processed:
+            texts = file_texts[file_path]
+            document_creates.append(save_document_vectors(
+                file_path, texts, file_vectors[file_path], hashes[file_path],
+                collection))
+            all_texts.extend(texts)
+            all_sources.extend([file_path] * len(texts))
+
+        if settings.VECTOR_STORE_BACKEND == "pgvector":
+            # 문서 행과 청크 행을 한 트랜잭션으로 저장 (COPY 가 실패하면
+            # 문서 행도 롤백). 다른 컬렉션에 있던 청크 행도 함께 교체
+            from domain.doc.document_pgvector import save_document_chunks
+
+            save_documents(db, document_creates, existing, commit=False)
+            documents = get_documents_by_paths(db, processed)
+            result = save_document_chunks(
+                db, collection, [documents[path] for path in processed],
+                file_texts, file_vectors)
+        else:
+            result = commit_to_merged_index(
+                np.concatenate([file_vectors[path] for path in processed]),
+                all_texts, all_sources, merged_db_path,
+                replaced_sources=list(replaced))
+            save_documents(db, document_creates, existing)
+    except Exception:
+        db.rollback()
+        for document_create in document_creates:
+            remove_document_files(document_create.embedding_file,
+                                  document_create.index_file,
+                                  document_create.unique_id)
+        raise
+
+    for embedding_file, index_file, unique_id, _ in replaced.values():
+        remove_document_files(embedding_file, index_file, unique_id)
+
+    if settings.VECTOR_STORE_BACKEND == "pgvector":
+        from domain.doc.document_pgvector import ensure_vector_index
+
+        # IVFFlat 인덱스는 첫 적재가 끝난 뒤 데이터로 학습해 생성
+        ensure_vector_index(db)
+        return result
+
+    # 다른 컬렉션에서 옮겨 온 문서는 이전 컬렉션 인덱스에서 제거
+    moved: dict[str, List[str]] = {}
+    for path, (*_, old_collection) in replaced.items():
+        if old_collection != collection:
+            moved.setdefault(old_collection, []).append(path)
+    for old_collection, paths in moved.items():
+        old_path = collection_path(old_collection)
+        if os.path.exists(os.path.join(old_path, INDEX_FILE)):
+            commit_to_merged_index(
+                np.empty((0, 0), dtype=np.float32), [], [],
+                old_path, replaced_sources=paths)
+    return result
+
+
+def ingest_files(db: Session, file_paths: List[str],
+                 collection: str = DEFAULT_COLLECTION,
+                 merged_db_path: str | None = None,
+                 workers: int | None = None,
+                 batch_size: int | None = None,
+                 commit_files: int | None = None) -> dict:
+    """
+    여러 문서를 병렬 파싱/배치 임베딩 후 컬렉션에 등록
+    내용 해시가 같은 파일은 로드하지 않고, 변경된 파일은 바뀐 청크만
+    임베딩한 뒤 통합 인덱스에서 해당 문서의 벡터를 교체한다
+    (다른 컬렉션에 있던 문서는 이전 컬렉션 인덱스에서 제거)
+    임베딩이 끝난 파일은 commit_files 개씩 반영하고 메모리에서 내린다
+    """
+    merged_db_path = merged_db_path or collection_path(collection)
+    workers = settings.INGEST_WORKERS if workers is None else workers
+    batch_size = batch_size or settings.INGEST_EMBED_BATCH_SIZE
+    commit_files = commit_files or settings.INGEST_COMMIT_FILES
+    file_paths = list(dict.fromkeys(file_paths))
+
+    embeddings = get_embeddings()
+    # 임베딩 중이거나 반영 대기 중인 파일만 보관
+    file_texts: dict[str, List[str]] = {}
+    file_vectors: dict[str, list | np.ndarray] = {}
+    remaining: dict[str, int] = {}  # 파일별 아직 임베딩되지 않은 청크 수
+    ready: List[str] = []  # 반영 대기 중인 파일
+    failed: dict[str, str] = {}
+    unchanged: List[str] = []
+    copies: dict[str, List[str]] = {}  # 원본 경로 -> 같은 내용의 경로들
+    pending_texts: List[str] = []
+    pending_slots: List[Tuple[str, int]] = []
+    reused_chunks = 0
+    processed = replaced = 0
+    # 묶음마다 더해지는 값 (나머지 통계는 마지막 반영 시점의 인덱스 기준)
+    summed = ("added_vectors", "exact_duplicates", "near_duplicates")
+    result = {"added_vectors": 0}
+
+    def mark_ready(file_path: str):
+        nonlocal reused_chunks
+        # 청크별 float 리스트 대신 float32 배열 하나로 보관
+        vectors = np.asarray(file_vectors[file_path], dtype=np.float32)
+        file_vectors[file_path] = vectors
+        ready.append(file_path)
+        for copy in copies.pop(file_path, []):
+            file_texts[copy] = file_texts[file_path]
+            file_vectors[copy] = vectors
+            reused_chunks += len(vectors)
+            ready.append(copy)
+
+    def mark_failed(file_path: str, error: str):
+        failed[file_path] = error
+        for copy in copies.pop(file_path, []):
+            failed[copy] = error
+
+    def commit_ready():
+        nonlocal processed, replaced, result
+        previous = result
+        result = _commit_files(db, collection, merged_db_path, ready,
+                               file_texts, file_vectors, hashes, existing)
+        for key in summed:
+            if key in result:
+                result[key] += previous.get(key, 0)
+        processed += len(ready)
+        replaced += sum(path in existing for path in ready)
+        for file_path in ready:
+            del file_texts[file_path], file_vectors[file_path]
+        ready.clear()
+
+    def _reuse_document(file_path: str, document) -> bool:
+        try:
+            metadata, vectors = load_document_vectors(document.unique_id)
+        except (OSError, ValueError):
+            return False
+        file_texts[file_path] = metadata.chunks
+        file_vectors[file_path] = vectors
+        return True
+
+    def embed_pending():
+        with external_call_duration.time(call="embed_documents"):
+            vectors = embeddings.embed_documents(pending_texts)
+        for (owner, slot), vector in zip(pending_slots, vectors):
+            file_vectors[owner][slot] = vector
+            remaining[owner] -= 1
+            if not remaining[owner]:
+                del remaining[owner]
+                mark_ready(owner)
+        pending_texts.clear()
+        pending_slots.clear()
+
+    with _executor(workers) as executor:
+        # 1) 로드 전에 내용 해시로 변경 여부 판단
+        if executor is None:
+            hashes = dict(zip(file_paths, map(_hash, file_paths)))
+        else:
+            hashes = dict(zip(file_paths, executor.map(
+                _hash, file_paths, chunksize=64)))
+        for file_path, content_hash in hashes.items():
+            if content_hash is None:
+                failed[file_path] = "File not readable"
+        existing = get_documents_by_paths(db, file_paths)
+        same_content = get_documents_by_hashes(
+            db, list({h for h in hashes.values() if h}))
+
+        to_split = []
+        reused = []
+        first_by_hash: dict[str, str] = {}
+        for file_path, content_hash in hashes.items():
+            if content_hash is None:
+                continue
+            document = existing.get(file_path)
+            if document is not None and \
+                    document.content_hash == content_hash and \
+                    document.collection == collection:
+                unchanged.append(file_path)
+            elif content_hash in first_by_hash:
+                copies.setdefault(first_by_hash[content_hash],
+                                  []).append(file_path)
+            elif document is None and content_hash in same_content and \
+                    _reuse_document(file_path, same_content[content_hash]):
+                # 이름만 바뀐 동일 파일: 기존 청크와 벡터 재사용
+                reused_chunks += len(file_vectors[file_path])
+                first_by_hash[content_hash] = file_path
+                reused.append(file_path)
+            else:
+                to_split.append(file_path)
+                first_by_hash[content_hash] = file_path
+        for file_path in reused:
+            mark_ready(file_path)
+            if len(ready) >= commit_files:
+                commit_ready()
+
+        # 2) 병렬 분할 후 새 청크만 배치 임베딩
+        for file_path, texts, error in _iter_split(executor, to_split):
+            if error or not texts:
+                mark_failed(file_path, error or "No text extracted")
+                continue
+            previous = {}
+            if file_path in existing:
+                previous = _previous_vectors(existing[file_path])
+            file_texts[file_path] = texts
+            file_vectors[file_path] = [None] * len(texts)
+            missing = 0
+            for slot, text in enumerate(texts):
+                vector = previous.get(chunk_hash(text))
+                if vector is not None:
+                    file_vectors[file_path][slot] = vector
+                    reused_chunks += 1
+                    continue
+                pending_texts.append(text)
+                pending_slots.append((file_path, slot))
+                missing += 1
+            if missing:
+                remaining[file_path] = missing
+            else:
+                mark_ready(file_path)
+            if len(pending_texts) >= batch_size:
+                embed_pending()
+            # 3) 임베딩이 끝난 파일을 commit_files 개씩 통합 인덱스/DB 에 반영
+            if len(ready) >= commit_files:
+                commit_ready()
+        if pending_texts:
+            embed_pending()
+    if ready:
+        commit_ready()
+
+    return {
+        "collection": collection,
+        "requested": len(file_paths),
+        "processed": processed,
+        "replaced": replaced,
+        "unchanged": len(unchanged),
+        "reused_chunks": reused_chunks,
+        "failed": failed,
+        **{key: value for key, value in result.items() if key != "status"},
+    }
+
+
+def process_document(db: Session, file_path: str,
+                     collection: str = DEFAULT_COLLECTION) -> DocumentMetadata:
+    """단일 문서 처리 및 벡터화 (변경 없는 파일은 저장된 결과 반환)"""
+    result = ingest_files(db, [file_path], collection, workers=0)
+    if file_path in result["failed"]:
+        raise HTTPException(status_code=422,
+                            detail=result["failed"][file_path])
+    document = get_documents_by_paths(db, [file_path])[file_path]
+    metadata, _ = load_document_vectors(document.unique_id)
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="디렉토리 또는 glob 패턴")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--commit-files", type=int, default=None)
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    parser.add_argument("--merged-db-path", default=None,
+                        help="지정하면 컬렉션 경로 대신 사용")
+    args = parser.parse_args()
+
+    from db.postgres import get_session_factory
+
+    db = get_session_factory()()
+    try:
+        result = ingest_files(db, collect_files(args.path),
+                              collection=args.collection,
+                              merged_db_path=args.merged_db_path,
+                              workers=args.workers,
+                              batch_size=args.batch_size,
+                              commit_files=args.commit_files)
+    finally:
+        db.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import json
+import math
+from typing import List
+
+import numpy as np
+from sqlalchemy import Float, cast, delete, func, literal, select, text
+from sqlalchemy.orm import Session
+
+from db.pgvector import Vector, copy_rows, vector_literal
+from domain.doc.document_embedding import check_dimension
+from metrics import external_call_duration
+from models import Document, DocumentChunk
+from settings import get_settings
+
+'''
+pgvector 벡터 저장소 (VECTOR_STORE_BACKEND=pgvector)
+
+청크 텍스트와 임베딩을 document_chunk 테이블에 문서(document.id)별로 저장해
+어느 노드에서나 같은 인덱스를 검색할 수 있게 한다. 적재는 문서의 기존 청크를
+지운 뒤 COPY 로 한 번에 넣고, 검색은 HNSW/IVFFlat 인덱스로 L2 거리 순 상위
+k 개를 찾아 FAISS 경로와 같은 형태(거리는 L2 제곱)로 반환한다.
+FAISS 통합 인덱스와 달리 중복 청크는 문서마다 따로 저장된다.
+
+IVFFlat 인덱스는 만들 때의 데이터로 리스트를 학습하므로 빈 테이블에 만들면
+recall 이 크게 떨어진다. 그래서 마이그레이션은 HNSW 만 만들고, IVFFlat 은 첫
+적재 후 만들며 데이터가 크게 늘면 다시 만든다.
+
+    python -m domain.doc.document_pgvector --index ivfflat
+'''
+
+settings = get_settings()
+
+CHUNK_COLUMNS = ("document_id", "collection", "chunk_index", "content",
+                 "embedding")
+VECTOR_INDEX_NAME = "ix_document_chunk_embedding"
+
+
+def save_document_chunks(db: Session, collection: str,
+                         documents: List[Document],
+                         file_texts: dict[str, List[str]],
+                         file_vectors: dict[str, np.ndarray]) -> dict:
+    """문서별 청크를 교체 저장 (DELETE 후 COPY, 세션의 문서 행과 함께 단일 커밋)"""
+    for document in documents:
+        vectors = file_vectors[document.file_path]
+        if len(vectors):
+            check_dimension(len(vectors[0]), settings.PGVECTOR_DIMENSION)
+
+    db.execute(delete(DocumentChunk).where(
+        DocumentChunk.document_id.in_([document.id
+                                       for document in documents])))
+    rows = (
+        (document.id, collection, chunk_index, chunk, vector_literal(vector))
+        for document in documents
+        for chunk_index, (chunk, vector) in enumerate(zip(
+            file_texts[document.file_path], file_vectors[document.file_path]))
+    )
+    # ORM 세션과 같은 트랜잭션의 DBAPI 커넥션으로 COPY
+    dbapi_connection = db.connection().connection.dbapi_connection
+    added = copy_rows(dbapi_connection, DocumentChunk.__tablename__,
+                      CHUNK_COLUMNS, rows, settings.PGVECTOR_COPY_BATCH_ROWS)
+    db.commit()
+    return {"added_vectors": added}
+
+
+def ivfflat_lists(rows: int) -> int:
+    """pgvector 권장 리스트 수 (100만 행까지 rows/1000, 그 이상은 sqrt)"""
+    if rows <= 1_000_000:
+        return max(rows // 1000, 1)
+    return int(math.sqrt(rows))
+
+
+def vector_index_exists(db: Session) -> bool:
+    return db.execute(text(
+        "SELECT 1 FROM pg_indexes WHERE indexname = :name"
+    ), {"name": VECTOR_INDEX_NAME}).scalar() is not None
+
+
+def build_vector_index(db: Session, index_type: str | None = None) -> dict:
+    """현재 데이터로 벡터 인덱스를 (다시) 만듦"""
+    index_type = index_type or settings.PGVECTOR_INDEX
+    if index_type == "ivfflat":
+        rows = db.execute(
+            select(func.count()).select_from(DocumentChunk)).scalar()
+        index_with = {"lists": settings.PGVECTOR_IVFFLAT_LISTS
+                      or ivfflat_lists(rows)}
+    else:
+        index_with = {"m": settings.PGVECTOR_HNSW_M,
+                      "ef_construction":
+                          settings.PGVECTOR_HNSW_EF_CONSTRUCTION}
+    if index_type not in ("hnsw", "ivfflat"):
+        raise ValueError(f"Unsupported vector index: {index_type}")
+    # DDL 은 바인드 파라미터를 받지 않으므로 정수로 변환해 넣음
+    options = ", ".join(f"{name} = {int(value)}"
+                        for name, value in index_with.items())
+    db.execute(text(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}"))
+    db.execute(text(
+        f"CREATE INDEX {VECTOR_INDEX_NAME} ON {DocumentChunk.__tablename__} "
+        f"USING {index_type} (embedding vector_l2_ops) WITH ({options})"))
+    db.commit()
+    return {"index": index_type, **index_with}
+
+
+def ensure_vector_index(db: Session):
+    """적재 후 호출: IVFFlat 인덱스가 아직 없으면 적재된 데이터로 생성"""
+    if settings.PGVECTOR_INDEX == "ivfflat" and not vector_index_exists(db):
+        build_vector_index(db, "ivfflat")
+
+
+# hnsw.ef_search 최대값
+MAX_EF_SEARCH = 1000
+
+_iterative_scan_supported: bool | None = None
+
+
+def _supports_iterative_scan(db: Session) -> bool:
+    """iterative index scan 지원 여부 (pgvector 0.8 이상, 프로세스당 한 번 확인)"""
+    global _iterative_scan_supported
+    if _iterative_scan_supported is None:
+        version = db.execute(text(
+            "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+        )).scalar() or "0"
+        parts = tuple(int(part) for part in version.split(".")[:2]
+                      if part.isdigit())
+        _iterative_scan_supported = parts >= (0, 8)
+    return _iterative_scan_supported
+
+
+def _set_search_params(db: Session, k: int, filtered: bool):
+    """
+    인덱스 검색 파라미터 설정
+    컬렉션 조건은 인덱스가 찾은 후보에 나중에 적용되므로 (post-filter),
+    작은 컬렉션도 k 개를 채우도록 iterative scan 으로 후보를 더 찾게 한다.
+    pgvector 0.8 미만에서는 후보(ef_search/probes) 안에 컬렉션 청크가 적으면
+    k 개보다 적게 반환될 수 있다.
+    """
+    # SET 은 바인드 파라미터를 받지 않으므로 정수로 변환해 넣음
+    iterative = filtered and _supports_iterative_scan(db)
+    if settings.PGVECTOR_INDEX == "ivfflat":
+        db.execute(text("SET LOCAL ivfflat.probes = %d"
+                        % int(settings.PGVECTOR_IVFFLAT_PROBES)))
+        if iterative:
+            db.execute(text("SET LOCAL ivfflat.iterative_scan = relaxed_order"))
+    else:
+        # HNSW 는 ef_search 개까지만 반환하므로 k 이상으로
+        ef_search = min(max(int(settings.PGVECTOR_HNSW_EF_SEARCH), k),
+                        MAX_EF_SEARCH)
+        db.execute(text("SET LOCAL hnsw.ef_search = %d" % ef_search))
+        if iterative:
+            db.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+
+
+def search_chunks(db: Session, query_vector: np.ndarray, k: int,
+                  collections: List[str] | None = None) -> List[dict]:
+    """L2 거리 순 상위 k 개 청크 (collections 가 없으면 전체 컬렉션)"""
+    check_dimension(query_vector.shape[-1], settings.PGVECTOR_DIMENSION)
+    query = cast(literal(vector_literal(query_vector)),
+                 Vector(settings.PGVECTOR_DIMENSION))
+    distance = DocumentChunk.embedding.op("<->", return_type=Float)(query)
+    statement = (
+        select(DocumentChunk.id, DocumentChunk.content,
+               DocumentChunk.collection, Document.file_path,
+               distance.label("distance"))
+        .join(Document, Document.id == DocumentChunk.document_id)
+        .order_by(distance)
+        .limit(k)
+    )
+    if collections:
+        statement = statement.where(DocumentChunk.collection.in_(collections))
+
+    # SET LOCAL 은 현재 트랜잭션(세션 autobegin)에만 적용됨
+    _set_search_params(db, k, bool(collections))
+    with external_call_duration.time(call="pgvector_search"):
+        rows = db.execute(statement).all()
+    # IVFFlat relaxed_order 는 순서가 조금 어긋날 수 있어 거리순으로 다시 정렬
+    rows.sort(key=lambda row: row.distance)
+    return [{
+        "chunk": row.content,
+        "source_file": row.file_path,
+        "source_files": [row.file_path],
+        # FAISS IndexFlatL2 와 같은 L2 제곱 거리
+        "distance": float(row.distance) ** 2,
+        "index": row.id,
+        "collection": row.collection,
+    } for row in rows]
+
+
+def list_chunk_collections(db: Session) -> List[str]:
+    return list(db.execute(select(DocumentChunk.collection).distinct()
+                           .order_by(DocumentChunk.collection)).scalars())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="document_chunk 벡터 인덱스 재생성")
+    parser.add_argument("--index", choices=("hnsw", "ivfflat"), default=None,
+                        help="지정하지 않으면 PGVECTOR_INDEX")
+    args = parser.parse_args()
+
+    from db.postgres import get_session_factory
+
+    db = get_session_factory()()
+    try:
+        result = build_vector_index(db, args.index)
+    finally:
+        db.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,50 @@
 import os
+from typing import List
+
 import numpy as np
 
-from fastapi import APIRouter, Depends, HTTPException
-from domain.doc.document_tool import (
-    process_document,
-    search_merged_index,
-    SUPPORTED_EXTENSIONS,
-    MERGED_DB_PATH
-)
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from admission import AdmissionLimiter
 from db.postgres import get_db
-from langchain_openai.embeddings import OpenAIEmbeddings
+from domain.user.user_router import get_admin_user, get_optional_user
+from metrics import external_call_duration
+from settings import get_settings
+
+# faiss/langchain 을 로드하는 document_tool, document_ingest 는 워커 기동
+# 시간을 줄이기 위해 첫 요청에서 import 한다
 
 
+settings = get_settings()
+
 router = APIRouter(
     prefix="/api/doc",
 )
 
+search_admission = AdmissionLimiter(
+    "/api/doc/search-merged", settings.DOC_SEARCH_MAX_CONCURRENCY,
+    settings.DOC_SEARCH_MAX_QUEUE, settings.ADMISSION_MAX_WAIT_SECONDS,
+    settings.ADMISSION_PER_USER_LIMIT)
+
 
 @router.post("/process-document")
-async def process_document_endpoint(file_path: str,
-                                    db: Session = Depends(get_db)):
+def process_document_endpoint(file_path: str, collection: str = "default",
+                              db: Session = Depends(get_db)):
     """
     문서 처리 API 엔드포인트
+    (통합 인덱스 쓰기 잠금을 기다릴 수 있어 이벤트 루프 대신 스레드풀에서 실행)
     """
+    from domain.doc.document_ingest import process_document
+
     try:
         if not os.path.exists(file_path):
             raise HTTPException(
                 status_code=404, detail=f"File not found: {file_path}")
 
-        metadata = process_document(db=db, file_path=file_path)
+        metadata = process_document(db=db, file_path=file_path,
+                                    collection=collection)
         return {
             "status": "success",
             "message": "Document processed successfully",
@@ -39,29 +54,81 @@ async def process_document_endpoint(file_path: str,
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/process-directory",
+             dependencies=[Depends(get_admin_user)])
+def process_directory_endpoint(path: str, collection: str = "default",
+                               db: Session = Depends(get_db)):
+    """
+    디렉토리 또는 glob 패턴의 문서 일괄 처리 API 엔드포인트 (관리자 전용)
+    path 는 INGEST_ROOT 기준이며 INGEST_ROOT 밖의 파일은 읽지 않는다
+    (CPU 작업이 길어 이벤트 루프 대신 스레드풀에서 실행)
+    """
+    from domain.doc.document_ingest import collect_files, ingest_files
+
+    file_paths = collect_files(path, root=settings.INGEST_ROOT)
+    if not file_paths:
+        raise HTTPException(
+            status_code=404, detail=f"No supported files found: {path}")
+    try:
+        result = ingest_files(db, file_paths, collection)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "success", **result}
+
+
 @router.get("/supported-formats")
 async def get_supported_formats():
     """지원되는 파일 형식 반환"""
+    from domain.doc.document_tool import SUPPORTED_EXTENSIONS
+
     return {"supported_formats": list(SUPPORTED_EXTENSIONS.keys())}
 
 
-@router.post("/search-merged")
-async def search_merged_endpoint(query: str, k: int = 5,
-                                 merged_db_path: str = MERGED_DB_PATH):
-    """통합된 인덱스에서 검색하는 엔드포인트"""
-    try:
-        # 쿼리 텍스트를 벡터로 변환
-        embeddings = OpenAIEmbeddings()
+@router.get("/collections")
+def get_collections():
+    """통합 인덱스가 있는 컬렉션 목록"""
+    from domain.doc.document_collection import get_collection_names
+
+    return {"collections": get_collection_names()}
+
+
+def _search_merged(query: str, k: int, collections: List[str] | None):
+    from domain.doc.document_collection import search_collections
+    from domain.doc.document_embedding import get_embeddings
+
+    # 쿼리 텍스트를 벡터로 변환
+    embeddings = get_embeddings()
+    with external_call_duration.time(call="embed_query"):
         query_vector = np.array(
             embeddings.embed_query(query), dtype=np.float32)
 
-        # 검색 수행
-        results = search_merged_index(query_vector, k, merged_db_path)
+    # 검색 수행 (디렉토리는 컬렉션 이름으로만 지정)
+    return search_collections(query_vector, k, collections)
+
+
+@router.post("/search-merged",
+             dependencies=[Depends(search_admission.dependency(
+                 get_optional_user))])
+async def search_merged_endpoint(
+        query: str, k: int = 5,
+        collections: List[str] | None = Query(None)):
+    """
+    통합된 인덱스에서 검색하는 엔드포인트
+    collections 를 여러 번 지정하면 함께 검색 (없으면 기본 컬렉션, * 는 전체)
+    """
+    try:
+        # 임베딩 API 호출과 검색은 이벤트 루프를 막지 않도록 스레드풀에서 실행
+        results = await run_in_threadpool(_search_merged, query, k,
+                                          collections)
 
         return {
             "status": "success",
             "query": query,
             "results": results
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
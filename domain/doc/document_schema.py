@@ -8,6 +8,7 @@ class DocumentMetadata(BaseModel):
     chunks: List[str]
     embedding_file: str
     index_file: str
+    collection: str = "default"
 
 
 class DocumentCreate(BaseModel):
@@ -15,6 +16,8 @@ class DocumentCreate(BaseModel):
     embedding_file: str
     index_file: str
     unique_id: str
+    content_hash: str | None = None
+    collection: str = "default"
     create_date: datetime.datetime | None = None
 
 
@@ -24,6 +27,8 @@ class Document(BaseModel):
     embedding_file: str
     index_file: str
     unique_id: str
+    content_hash: str | None = None
+    collection: str = "default"
     create_date: datetime.datetime
 
 
@@ -0,0 +1,100 @@
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+from domain.doc.document_embedding import DEFAULT_LOCAL_MODEL
+from settings import get_settings
+
+'''
+문서 청크 분할
+
+CHUNK_LENGTH_UNIT=char 이면 문자 수, token 이면 임베딩 모델 토크나이저의
+토큰 수로 청크 길이를 잰다. 문단 -> 줄 -> 문장 끝 -> 공백 순으로 분할 지점을
+찾아 한국어 문장이 중간에서 잘리지 않게 하고, 확장자별로 전략을 달리한다.
+  - .csv : 행을 쪼개지 않고 길이 한도까지 묶음
+  - 그 외 : 페이지(로더가 반환하는 문서) 단위 재귀 분할
+로더의 lazy_load() 로 페이지/행을 하나씩 받아 전체 문서를 메모리에 올리지 않는다.
+'''
+
+settings = get_settings()
+
+# 문단 -> 줄 -> 문장 끝(. ? ! 뒤 공백) -> 공백 -> 문자
+SENTENCE_SEPARATORS = [r"\n\n", r"\n", r"(?<=[.?!。…])\s+", r"\s+", ""]
+
+
+@lru_cache()
+def get_length_function() -> Callable[[str], int]:
+    """청크 길이 측정 함수 (문자 수 또는 임베딩 모델 토큰 수)"""
+    if settings.CHUNK_LENGTH_UNIT == "char":
+        return len
+    if settings.CHUNK_LENGTH_UNIT != "token":
+        raise ValueError(
+            f"Unsupported chunk length unit: {settings.CHUNK_LENGTH_UNIT}")
+
+    if settings.EMBEDDING_BACKEND == "local":
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(
+            settings.EMBEDDING_MODEL or DEFAULT_LOCAL_MODEL)
+        return lambda text: len(
+            tokenizer.encode(text, add_special_tokens=False))
+
+    import tiktoken
+
+    encoding = tiktoken.encoding_for_model(
+        settings.EMBEDDING_MODEL or "text-embedding-ada-002")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def get_text_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=settings.CHUNK_SIZE,
+        chunk_overlap=settings.CHUNK_OVERLAP,
+        length_function=get_length_function(),
+        separators=SENTENCE_SEPARATORS,
+        is_separator_regex=True,
+        keep_separator="end",
+    )
+
+
+def split_pages(documents: Iterable[Document]) -> Iterator[str]:
+    """페이지별 문장 경계 재귀 분할"""
+    text_splitter = get_text_splitter()
+    for document in documents:
+        yield from text_splitter.split_text(document.page_content)
+
+
+def pack_rows(documents: Iterable[Document]) -> Iterator[str]:
+    """CSV 행을 쪼개지 않고 길이 한도까지 묶음 (한도를 넘는 행만 분할)"""
+    length_function = get_length_function()
+    rows, size = [], 0
+    for document in documents:
+        row = document.page_content.strip()
+        if not row:
+            continue
+        # 행 구분 줄바꿈 1 단위 포함
+        row_size = length_function(row) + 1
+        if rows and size + row_size > settings.CHUNK_SIZE:
+            yield "\n".join(rows)
+            rows, size = [], 0
+        if row_size > settings.CHUNK_SIZE:
+            yield from get_text_splitter().split_text(row)
+            continue
+        rows.append(row)
+        size += row_size
+    if rows:
+        yield "\n".join(rows)
+
+
+# 확장자별 분할 전략 (없으면 split_pages)
+CHUNK_STRATEGIES = {
+    ".csv": pack_rows,
+}
+
+
+def iter_chunks(loader, extension: str) -> Iterator[str]:
+    """로더에서 페이지/행을 하나씩 받아 청크 텍스트 생성"""
+    strategy = CHUNK_STRATEGIES.get(extension, split_pages)
+    yield from strategy(loader.lazy_load())
@@ -1,25 +1,46 @@
 import os
 import glob
+import hashlib
 import pickle
 import json
+import re
 import uuid
 import faiss
 import numpy as np
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterable, Tuple
 from dotenv import load_dotenv
 from fastapi import HTTPException
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import (
     PyPDFLoader,
     TextLoader,
     Docx2txtLoader,
     CSVLoader,
 )
-from langchain_openai.embeddings import OpenAIEmbeddings
+from domain.doc.document_dedup import (
+    ChunkDeduplicator,
+    dedup_summary,
+    normalize_merged_metadata,
+    remove_sources,
+)
+from domain.doc.document_embedding import get_embeddings, check_dimension
+from domain.doc.document_index import (
+    INDEX_FILE,
+    PENDING_DIR,
+    enqueue_pending,
+    fail_pending,
+    finish_pending,
+    get_merged_index,
+    list_pending,
+    load_pending,
+    merged_writer_lock,
+    pop_result,
+    publish_merged_index,
+    remove_expired_results,
+)
 from domain.doc.document_schema import DocumentMetadata, DocumentCreate
-from domain.doc.document_crud import create_document
-from sqlalchemy.orm import Session
+from domain.doc.document_splitter import iter_chunks
+from metrics import external_call_duration
 
 '''
 파일 업로드 후 업로드된 파일을 바탕으로 Retrieve
@@ -31,8 +52,9 @@ VECTOR_DB_PATH = "vector_db"
 METADATA_PATH = "metadata"
 MERGED_DB_PATH = "merged_db"
 
-CHUNK_SIZE = 1000
-CHUNK_OVERLAP = 200
+# 컬렉션별 통합 인덱스는 merged_db/<컬렉션> (기본 컬렉션은 merged_db 자체)
+DEFAULT_COLLECTION = "default"
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 
 # 지원하는 파일 타입
 SUPPORTED_EXTENSIONS = {
@@ -48,6 +70,44 @@ def create_directory_if_not_exists(directory: str):
     Path(directory).mkdir(parents=True, exist_ok=True)
 
 
+def collection_path(collection: str | None = None) -> str:
+    """컬렉션 이름 -> 통합 인덱스 디렉토리"""
+    collection = collection or DEFAULT_COLLECTION
+    if not COLLECTION_NAME_PATTERN.match(collection) or \
+            collection == PENDING_DIR:
+        raise HTTPException(status_code=400,
+                            detail=f"Invalid collection name: {collection}")
+    if collection == DEFAULT_COLLECTION:
+        return MERGED_DB_PATH
+    return os.path.join(MERGED_DB_PATH, collection)
+
+
+def collection_of(merged_db_path: str) -> str | None:
+    """통합 인덱스 디렉토리의 컬렉션 이름 (컬렉션 경로가 아니면 None)"""
+    path = os.path.normpath(merged_db_path)
+    root = os.path.normpath(MERGED_DB_PATH)
+    if path == root:
+        return DEFAULT_COLLECTION
+    if os.path.dirname(path) == root:
+        return os.path.basename(path)
+    return None
+
+
+def list_collections() -> List[str]:
+    """통합 인덱스가 만들어진 컬렉션 목록"""
+    collections = []
+    if os.path.exists(os.path.join(MERGED_DB_PATH, INDEX_FILE)):
+        collections.append(DEFAULT_COLLECTION)
+    if os.path.isdir(MERGED_DB_PATH):
+        for name in sorted(os.listdir(MERGED_DB_PATH)):
+            if name != DEFAULT_COLLECTION and \
+                    COLLECTION_NAME_PATTERN.match(name) and \
+                    os.path.exists(os.path.join(MERGED_DB_PATH, name,
+                                                INDEX_FILE)):
+                collections.append(name)
+    return collections
+
+
 def get_document_loader(file_path: str):
     """파일 확장자에 따른 적절한 로더 반환"""
     file_extension = Path(file_path).suffix.lower()
@@ -60,25 +120,32 @@ def get_document_loader(file_path: str):
     return SUPPORTED_EXTENSIONS[file_extension](file_path)
 
 
-def process_document(db: Session, file_path: str) -> DocumentMetadata:
-    """문서 처리 및 벡터화"""
-    # 문서 로드
-    loader = get_document_loader(file_path)
-    documents = loader.load()
+def file_content_hash(file_path: str) -> str:
+    """파일 내용 SHA-256 (로드/파싱 전에 변경 여부 확인용)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
-    # 텍스트 분할
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        length_function=len,
-    )
-    chunks = text_splitter.split_documents(documents)
-    texts = [doc.page_content for doc in chunks]
 
-    # 임베딩 생성
-    embeddings = OpenAIEmbeddings()
-    vectors = embeddings.embed_documents(texts)
+def chunk_hash(text: str) -> str:
+    """청크 텍스트 해시 (변경된 청크만 재임베딩)"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
+
+def split_document(file_path: str) -> List[str]:
+    """문서 로드 후 청크 텍스트 목록 반환 (페이지/행 단위로 스트리밍)"""
+    loader = get_document_loader(file_path)
+    return list(iter_chunks(loader, Path(file_path).suffix.lower()))
+
+
+def save_document_vectors(file_path: str, texts: List[str],
+                          vectors: List[List[float]],
+                          content_hash: str | None = None,
+                          collection: str = DEFAULT_COLLECTION
+                          ) -> DocumentCreate:
+    """문서별 임베딩/인덱스/메타데이터 파일 저장"""
     # FAISS 인덱스 생성
     dimension = len(vectors[0])
     index = faiss.IndexFlatL2(dimension)
@@ -94,48 +161,61 @@ def process_document(db: Session, file_path: str) -> DocumentMetadata:
     embedding_file = f"{VECTOR_DB_PATH}/embeddings_{unique_id}.pkl"
     index_file = f"{VECTOR_DB_PATH}/index_{unique_id}.faiss"
 
-    # 벡터와 메타데이터 저장
     with open(embedding_file, 'wb') as f:
         pickle.dump(vectors, f)
 
     faiss.write_index(index, index_file)
 
-    # 메타데이터 생성 및 반환
+    # 메타데이터 로컬 저장
     metadata = DocumentMetadata(
         file_path=file_path,
         chunks=texts,
         embedding_file=embedding_file,
-        index_file=index_file
+        index_file=index_file,
+        collection=collection
     )
+    with open(f"{METADATA_PATH}/{unique_id}.json", 'w', encoding='utf-8') as f:
+        json.dump(metadata.dict(), f, ensure_ascii=False, indent=2)
 
-    # 메타데이터 DB 저장
-    create_document(
-        db, DocumentCreate(
-            file_path=file_path,
-            embedding_file=embedding_file,
-            index_file=index_file,
-            unique_id=unique_id
-        )
+    return DocumentCreate(
+        file_path=file_path,
+        embedding_file=embedding_file,
+        index_file=index_file,
+        unique_id=unique_id,
+        content_hash=content_hash,
+        collection=collection
     )
 
-    # 메타데이터 로컬 저장
-    with open(f"{METADATA_PATH}/{unique_id}.json", 'w', encoding='utf-8') as f:
-        json.dump(metadata.dict(), f, ensure_ascii=False, indent=2)
 
-    # 메타데이터 통합 및 추가
-    append_to_merged_index(file_path, MERGED_DB_PATH)
+def load_document_vectors(unique_id: str) -> Tuple[DocumentMetadata, list]:
+    """저장된 문서 메타데이터와 임베딩 로드"""
+    with open(f"{METADATA_PATH}/{unique_id}.json", 'r',
+              encoding='utf-8') as f:
+        metadata = DocumentMetadata(**json.load(f))
+    with open(metadata.embedding_file, 'rb') as f:
+        vectors = pickle.load(f)
+    return metadata, vectors
+
 
-    return metadata
+def remove_document_files(embedding_file: str, index_file: str,
+                          unique_id: str):
+    """교체된 문서의 임베딩/인덱스/메타데이터 파일 삭제"""
+    for path in (embedding_file, index_file,
+                 f"{METADATA_PATH}/{unique_id}.json"):
+        if os.path.exists(path):
+            os.remove(path)
 
 
-def load_all_metadata() -> List[Dict]:
-    """메타데이터 디렉토리에서 모든 메타데이터 파일을 로드"""
+def load_all_metadata(collection: str | None = None) -> List[Dict]:
+    """메타데이터 디렉토리에서 모든(또는 컬렉션의) 메타데이터 파일을 로드"""
     metadata_files = glob.glob(f"{METADATA_PATH}/*.json")
     all_metadata = []
 
     for metadata_file in metadata_files:
         with open(metadata_file, 'r', encoding='utf-8') as f:
             metadata = json.load(f)
+        if collection is None or \
+                metadata.get("collection", DEFAULT_COLLECTION) == collection:
             all_metadata.append(metadata)
 
     return all_metadata
@@ -143,11 +223,17 @@ def load_all_metadata() -> List[Dict]:
 
 def merge_faiss_indexes(output_path: str = MERGED_DB_PATH):
     """모든 FAISS 인덱스를 하나로 통합"""
+    with merged_writer_lock(output_path):
+        return _merge_faiss_indexes(output_path)
+
+
+def _merge_faiss_indexes(output_path: str):
+    """메타데이터 디렉토리 기준 전체 재병합 (writer 잠금 안에서 호출)"""
     # 출력 디렉토리 생성
     create_directory_if_not_exists(output_path)
 
-    # 모든 메타데이터 로드
-    all_metadata = load_all_metadata()
+    # 모든 메타데이터 로드 (컬렉션 경로면 해당 컬렉션 문서만)
+    all_metadata = load_all_metadata(collection_of(output_path))
     if not all_metadata:
         raise HTTPException(
             status_code=404, detail="No indexes found to merge")
@@ -175,63 +261,74 @@ def merge_faiss_indexes(output_path: str = MERGED_DB_PATH):
         raise HTTPException(
             status_code=404, detail="No vectors found to merge")
 
-    # NumPy 배열로 변환
-    all_vectors = np.array(all_vectors, dtype=np.float32)
-
-    # 새로운 FAISS 인덱스 생성
-    dimension = all_vectors.shape[1]
-    merged_index = faiss.IndexFlatL2(dimension)
-    merged_index.add(all_vectors)
-
-    # 통합된 인덱스 저장
-    merged_index_path = f"{output_path}/merged_index.faiss"
-    faiss.write_index(merged_index, merged_index_path)
+    # 서로 다른 임베딩 백엔드로 만든 문서가 섞이지 않았는지 확인
+    dimensions = {len(vector) for vector in all_vectors}
+    if len(dimensions) > 1:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Documents have mixed embedding dimensions: "
+                   f"{sorted(dimensions)}")
 
-    # 통합된 메타데이터 저장
+    # 중복 청크는 벡터 하나에 출처만 추가
+    dimension = dimensions.pop()
     merged_metadata = {
-        "total_vectors": len(all_vectors),
+        "total_vectors": 0,
+        "total_chunks": 0,
         "dimension": dimension,
-        "source_mapping": source_mapping,
-        "chunks": all_chunks,
+        "source_mapping": [],
+        "chunks": [],
+        "chunk_hashes": [],
+        "chunk_simhashes": [],
         "original_files": [metadata['file_path'] for metadata in all_metadata]
     }
+    deduplicator = ChunkDeduplicator(merged_metadata)
+    unique_vectors = [
+        vector for vector, chunk, source in
+        zip(all_vectors, all_chunks, source_mapping)
+        if deduplicator.add(chunk, source)]
 
-    with open(f"{output_path}/merged_metadata.json", 'w',
-              encoding='utf-8') as f:
-        json.dump(merged_metadata, f, ensure_ascii=False, indent=2)
+    # 새로운 FAISS 인덱스 생성
+    merged_index = faiss.IndexFlatL2(dimension)
+    merged_index.add(np.array(unique_vectors, dtype=np.float32))
+
+    # 통합된 인덱스/메타데이터 교체 (검색 워커는 generation 으로 감지)
+    publish_merged_index(output_path, merged_index, merged_metadata)
 
     return {
-        "index_path": merged_index_path,
+        "index_path": f"{output_path}/merged_index.faiss",
         "metadata_path": f"{output_path}/merged_metadata.json",
-        "total_vectors": len(all_vectors),
-        "total_documents": len(all_metadata)
+        "total_vectors": merged_metadata["total_vectors"],
+        "total_documents": len(all_metadata),
+        **dedup_summary(merged_metadata, dimension)
     }
 
 
 def search_merged_index(query_vector: np.ndarray, k: int = 5,
                         merged_db_path: str = MERGED_DB_PATH):
-    """통합된 인덱스에서 검색 수행"""
-    # 인덱스 로드
+    """통합된 인덱스에서 검색 수행 (워커 간 공유되는 mmap 스냅샷 사용)"""
     index_path = f"{merged_db_path}/merged_index.faiss"
     if not os.path.exists(index_path):
         raise HTTPException(status_code=404, detail="Merged index not found")
 
-    merged_index = faiss.read_index(index_path)
-
-    # 메타데이터 로드
-    with open(f"{merged_db_path}/merged_metadata.json", 'r',
-              encoding='utf-8') as f:
-        metadata = json.load(f)
+    snapshot = get_merged_index(merged_db_path)
+    check_dimension(query_vector.shape[-1], snapshot.index.d)
 
     # 검색 수행
-    distances, indices = merged_index.search(query_vector.reshape(1, -1), k)
+    with external_call_duration.time(call="faiss_search"):
+        distances, indices = snapshot.index.search(
+            query_vector.reshape(1, -1), k)
 
-    # 결과 구성
+    # 결과 구성 (k 가 벡터 수보다 크면 -1 이 채워짐)
     results = []
-    for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
+    for distance, idx in zip(distances[0], indices[0]):
+        if idx < 0:
+            continue
+        # 중복 제거된 청크는 출처가 여러 개
+        source_files = list(dict.fromkeys(snapshot.sources_of(idx)))
         results.append({
-            "chunk": metadata["chunks"][idx],
-            "source_file": metadata["source_mapping"][idx],
+            "chunk": snapshot.chunk(idx),
+            "source_file": source_files[0],
+            "source_files": source_files,
             "distance": float(distance),
             "index": int(idx)
         })
@@ -239,98 +336,174 @@ def search_merged_index(query_vector: np.ndarray, k: int = 5,
     return results
 
 
-def append_to_merged_index(file_path: str,
-                           merged_db_path: str = MERGED_DB_PATH):
-    """새로운 문서를 기존 통합 인덱스에 추가"""
-    # 기존 통합 인덱스와 메타데이터 경로
+def add_to_merged_index(new_vectors: np.ndarray, texts: List[str],
+                        sources: List[str],
+                        merged_db_path: str = MERGED_DB_PATH,
+                        replaced_sources: Iterable[str] = ()):
+    """
+    새 벡터를 통합 인덱스에 추가 (단일 writer, group commit)
+    replaced_sources 에 해당하는 문서의 기존 벡터는 먼저 제거한다
+    """
+    batch_id = enqueue_pending(merged_db_path, {
+        "vectors": new_vectors,
+        "texts": texts,
+        "sources": sources,
+        "replaced_sources": list(replaced_sources),
+    })
+    with merged_writer_lock(merged_db_path):
+        # 기다리는 동안 다른 writer 가 함께 반영했으면 결과만 가져감
+        result = pop_result(merged_db_path, batch_id)
+        if result is None:
+            _commit_pending(merged_db_path)
+            result = pop_result(merged_db_path, batch_id)
+
+    if result is None:
+        # 잠금을 MERGE_RESULT_TTL_SECONDS 넘게 기다려 결과가 정리됨
+        raise HTTPException(status_code=500,
+                            detail="Merge result expired before it was read")
+    if result["status"] != "success":
+        raise HTTPException(status_code=result["status_code"],
+                            detail=result["detail"])
+    return result
+
+
+def _error_result(e: Exception) -> dict:
+    if isinstance(e, HTTPException):
+        return {"status": "error", "status_code": e.status_code,
+                "detail": e.detail}
+    return {"status": "error", "status_code": 500, "detail": str(e)}
+
+
+def _commit_pending(merged_db_path: str):
+    """
+    쌓인 pending 배치를 한 번의 인덱스 갱신/메타데이터 쓰기로 반영
+    (writer 잠금 안에서 호출, 실패한 배치는 오류 결과와 함께 failed 로 옮김)
+    """
+    remove_expired_results(merged_db_path)
+    batch_ids = list_pending(merged_db_path)
+    if not batch_ids:
+        return
+    try:
+        _commit_batches(merged_db_path, batch_ids)
+        return
+    except Exception as e:
+        if len(batch_ids) == 1:
+            fail_pending(merged_db_path, batch_ids[0], _error_result(e))
+            return
+
+    # 어느 배치 때문에 실패했는지 모르므로 하나씩 다시 반영
+    for batch_id in batch_ids:
+        try:
+            _commit_batches(merged_db_path, [batch_id])
+        except Exception as e:
+            fail_pending(merged_db_path, batch_id, _error_result(e))
+
+
+def _commit_batches(merged_db_path: str, batch_ids: List[str]):
+    """배치들을 한 번에 반영 (실패하면 아무것도 교체하지 않음)"""
     merged_index_path = f"{merged_db_path}/merged_index.faiss"
     merged_metadata_path = f"{merged_db_path}/merged_metadata.json"
 
-    # 파일 존재 확인
+    # 통합 인덱스가 없으면 메타데이터 디렉토리 기준으로 새로 만듦
     if not os.path.exists(merged_index_path) or \
             not os.path.exists(merged_metadata_path):
-        merge_faiss_indexes(output_path=merged_db_path)
+        _merge_faiss_indexes(merged_db_path)
+
+    # 기존 인덱스 로드
+    merged_index = faiss.read_index(merged_index_path)
+
+    # 기존 메타데이터 로드
+    with open(merged_metadata_path, 'r', encoding='utf-8') as f:
+        merged_metadata = normalize_merged_metadata(json.load(f))
+    deduplicator = ChunkDeduplicator(merged_metadata)
+
+    results = {}
+    for batch_id in batch_ids:
+        batch = load_pending(merged_db_path, batch_id)
+        new_vectors = batch["vectors"]
+
+        # 차원 일치 확인 (맞지 않는 배치만 실패 처리)
+        if len(new_vectors) and new_vectors.shape[1] != merged_index.d:
+            results[batch_id] = {
+                "status": "error",
+                "status_code": 409,
+                "detail": f"Embedding dimension {new_vectors.shape[1]} "
+                          f"does not match index dimension "
+                          f"{merged_index.d}",
+            }
+            continue
+
+        # 교체 대상 문서를 출처에서 제거, 출처가 없어진 벡터는 삭제
+        # (IndexFlat 은 제거 후 번호를 당기므로 중복 탐지 색인도 당김)
+        total = len(merged_metadata["chunks"])
+        removed = remove_sources(merged_metadata,
+                                 set(batch["replaced_sources"]))
+        if removed:
+            merged_index.remove_ids(np.array(removed, dtype=np.int64))
+            deduplicator.remove(removed, total)
+
+        # 중복이 아닌 청크의 벡터만 추가
+        exact = deduplicator.stats["exact_duplicates"]
+        near = deduplicator.stats["near_duplicates"]
+        added = [vector for vector, chunk, source in
+                 zip(new_vectors, batch["texts"], batch["sources"])
+                 if deduplicator.add(chunk, source)]
+        if added:
+            merged_index.add(np.array(added, dtype=np.float32))
+
+        original_files = set(merged_metadata["original_files"])
+        for source in dict.fromkeys(batch["sources"]):
+            if source not in original_files:
+                merged_metadata["original_files"].append(source)
+        results[batch_id] = {
+            "status": "success",
+            "added_vectors": len(added),
+            "exact_duplicates": deduplicator.stats["exact_duplicates"] - exact,
+            "near_duplicates": deduplicator.stats["near_duplicates"] - near,
+        }
+
+    # 모든 배치를 한 번에 교체 (write-then-rename)
+    publish_merged_index(merged_db_path, merged_index, merged_metadata)
+
+    summary = dedup_summary(merged_metadata, merged_index.d)
+    for batch_id, result in results.items():
+        if result["status"] == "success":
+            result["total_vectors"] = merged_metadata["total_vectors"]
+            result["total_documents"] = len(merged_metadata["original_files"])
+            result.update(summary)
+        finish_pending(merged_db_path, batch_id, result)
+
+
+def commit_to_merged_index(new_vectors: np.ndarray, texts: List[str],
+                           sources: List[str],
+                           merged_db_path: str = MERGED_DB_PATH,
+                           replaced_sources: Iterable[str] = ()):
+    """
+    메타데이터 디렉토리에 이미 저장된 문서의 벡터를 통합 인덱스에 반영
+    전체 재병합에 이미 포함되었을 수 있으므로 같은 출처의 벡터는 교체한다
+    """
+    return add_to_merged_index(
+        new_vectors, texts, sources, merged_db_path,
+        replaced_sources=set(replaced_sources) | set(sources))
 
-        # raise HTTPException(
-        #     status_code=404,
-        #     detail="Merged index or metadata not found. "
-        #     "Please create merged index first."
-        # )
 
-    # 새로운 문서 처리
+def append_to_merged_index(file_path: str,
+                           merged_db_path: str = MERGED_DB_PATH):
+    """새로운 문서를 기존 통합 인덱스에 추가"""
     try:
         # 문서 로드 및 처리
-        loader = get_document_loader(file_path)
-        documents = loader.load()
-
-        # 텍스트 분할
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=CHUNK_SIZE,
-            chunk_overlap=CHUNK_OVERLAP,
-            length_function=len,
-        )
-        chunks = text_splitter.split_documents(documents)
-        texts = [doc.page_content for doc in chunks]
+        texts = split_document(file_path)
 
         # 임베딩 생성
-        embeddings = OpenAIEmbeddings()
-        new_vectors = embeddings.embed_documents(texts)
+        embeddings = get_embeddings()
+        with external_call_duration.time(call="embed_documents"):
+            new_vectors = embeddings.embed_documents(texts)
         new_vectors = np.array(new_vectors, dtype=np.float32)
 
-        # 기존 인덱스 로드
-        merged_index = faiss.read_index(merged_index_path)
-
-        # 기존 메타데이터 로드
-        with open(merged_metadata_path, 'r', encoding='utf-8') as f:
-            merged_metadata = json.load(f)
-
-        # 차원 일치 확인
-        if new_vectors.shape[1] != merged_index.d:
-            raise ValueError(
-                "New vectors dimension does not match existing index")
-
-        # 백업 생성
-        backup_index_path = f"{merged_db_path}/merged_index.faiss.backup"
-        backup_metadata_path = f"{merged_db_path}/merged_metadata.json.backup"
-
-        faiss.write_index(merged_index, backup_index_path)
-        with open(backup_metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(merged_metadata, f, ensure_ascii=False, indent=2)
-
-        try:
-            # 새로운 벡터 추가
-            merged_index.add(new_vectors)
-
-            # 메타데이터 업데이트
-            merged_metadata["total_vectors"] += len(new_vectors)
-            merged_metadata["chunks"].extend(texts)
-            merged_metadata["source_mapping"].extend([file_path] * len(texts))
-            if file_path not in merged_metadata["original_files"]:
-                merged_metadata["original_files"].append(file_path)
-
-            # 업데이트된 인덱스와 메타데이터 저장
-            faiss.write_index(merged_index, merged_index_path)
-            with open(merged_metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(merged_metadata, f, ensure_ascii=False, indent=2)
-
-            # 백업 파일 삭제
-            os.remove(backup_index_path)
-            os.remove(backup_metadata_path)
-
-            return {
-                "status": "success",
-                "added_vectors": len(new_vectors),
-                "total_vectors": merged_metadata["total_vectors"],
-                "total_documents": len(merged_metadata["original_files"])
-            }
-
-        except Exception as e:
-            # 에러 발생 시 백업에서 복구
-            if os.path.exists(backup_index_path) and \
-                    os.path.exists(backup_metadata_path):
-                os.replace(backup_index_path, merged_index_path)
-                os.replace(backup_metadata_path, merged_metadata_path)
-            raise e
+        return add_to_merged_index(new_vectors, texts,
+                                   [file_path] * len(texts), merged_db_path)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
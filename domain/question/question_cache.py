@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
+
+from db.postgres import SQLALCHEMY_DATABASE_URL, is_replica_session
+from settings import get_settings
+
+settings = get_settings()
+
+'''
+질문 목록/상세 응답 캐시
+
+직렬화된 응답 본문을 (엔드포인트, 파라미터) 키로 보관하고 ETag 를
+붙여 If-None-Match 요청에는 본문 없이 304 로 응답한다.
+질문/답변의 생성, 수정, 삭제, 추천은 커밋한 뒤 NOTIFY 로 질문 ID 와
+커밋 시점의 WAL 위치를 알린다 (publish_change, 행 잠금 없음). 각 워커는
+전용 연결로 LISTEN 하며 받은 알림마다 목록 전체와 해당 질문 상세만
+무효화하므로, 캐시 조회 자체는 DB 를 거치지 않는다.
+캐시 항목은 본문을 만들기 전의 알림 순번을 함께 저장해, 만드는 도중에
+도착한 알림으로 무효화된 본문은 사용하지 않는다. 알림을 받는 연결이
+없으면 다른 워커의 쓰기를 알 수 없으므로 캐시를 쓰지 않는다.
+'''
+
+CHANNEL = "question_cache"
+LIST_SCOPE = "list"
+_LISTENER_PING_SECONDS = 10
+_LISTENER_RETRY_SECONDS = 1
+
+# key -> (만료시각, 무효화 범위, 알림 순번, 본문, ETag)
+_responses: OrderedDict[tuple, tuple[float, object, int, bytes, str]] = \
+    OrderedDict()
+# 무효화 범위(LIST_SCOPE 또는 질문 ID) -> 마지막으로 무효화된 알림 순번
+_invalidated: OrderedDict[object, int] = OrderedDict()
+_sequence = 0
+_forgotten = 0  # _invalidated 에서 밀려난 범위의 최대 순번
+_required_lsn = 0  # 알림으로 받은 가장 최근 커밋의 WAL 위치
+_listener: asyncio.Task | None = None
+_listening = False
+
+
+def _parse_lsn(lsn: str) -> int:
+    high, low = lsn.split("/")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def _format_lsn(lsn: int) -> str:
+    return f"{lsn >> 32:X}/{lsn & 0xFFFFFFFF:X}"
+
+
+def _invalidate(question_id: int, lsn: str | None = None):
+    global _sequence, _forgotten
+    _sequence += 1
+    for scope in (LIST_SCOPE, question_id):
+        _invalidated[scope] = _sequence
+        _invalidated.move_to_end(scope)
+    while len(_invalidated) > settings.RESPONSE_CACHE_MAX_SIZE:
+        _, sequence = _invalidated.popitem(last=False)
+        _forgotten = max(_forgotten, sequence)
+    _responses.pop(("detail", question_id), None)
+    if lsn:
+        _require_lsn(lsn)
+
+
+def _require_lsn(lsn: str):
+    global _required_lsn
+    _required_lsn = max(_required_lsn, _parse_lsn(lsn))
+
+
+def _invalidate_all():
+    global _sequence, _forgotten
+    _sequence += 1
+    _forgotten = _sequence
+    _invalidated.clear()
+    _responses.clear()
+
+
+def _on_notification(connection, pid, channel, payload: str):
+    try:
+        question_id, lsn = payload.split()
+        _invalidate(int(question_id), lsn)
+    except ValueError:
+        _invalidate_all()
+
+
+async def _listen():
+    """NOTIFY 를 받는 전용 연결 유지 (끊기면 캐시를 비우고 다시 연결)"""
+    global _listening
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(
+                "postgresql://" + SQLALCHEMY_DATABASE_URL)
+            await connection.add_listener(CHANNEL, _on_notification)
+            # 연결이 없던 동안의 알림은 받지 못했을 수 있음
+            _invalidate_all()
+            _listening = True
+            while True:
+                await asyncio.sleep(_LISTENER_PING_SECONDS)
+                await asyncio.wait_for(connection.execute("SELECT 1"),
+                                       _LISTENER_PING_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        finally:
+            _listening = False
+            if connection is not None:
+                connection.terminate()
+        await asyncio.sleep(_LISTENER_RETRY_SECONDS)
+
+
+def _ensure_listener():
+    global _listener
+    if _listener is None or _listener.done():
+        _listener = asyncio.get_running_loop().create_task(_listen())
+
+
+async def publish_change(db: AsyncSession, question_id: int):
+    """질문/답변 쓰기를 커밋한 뒤 호출 (모든 워커의 목록과 해당 질문 상세 무효화)"""
+    # 현재 워커는 알림을 기다리지 않고 바로 무효화 (자신의 쓰기를 바로 봄)
+    _invalidate(question_id)
+    try:
+        # 별도의 짧은 트랜잭션: pg_notify 는 커밋될 때 전달되며 행 잠금이 없음
+        row = (await db.execute(
+            text("SELECT lsn, pg_notify(:channel, :payload || ' ' || lsn) "
+                 "FROM (SELECT pg_current_wal_lsn()::text AS lsn) AS wal"),
+            {"channel": CHANNEL, "payload": str(question_id)})).one()
+        await db.commit()
+    except Exception:
+        # 쓰기는 이미 커밋됨. 다른 워커는 TTL 이 지나면 다시 조회한다
+        await db.rollback()
+        return
+    # 이 워커가 복제본에서 읽은 본문도 이 커밋을 재생한 뒤에만 저장
+    _require_lsn(row.lsn)
+
+
+async def _replica_caught_up(db: AsyncSession) -> bool:
+    """복제본이 알림으로 받은 마지막 커밋까지 재생했는지"""
+    if not is_replica_session(db) or not _required_lsn:
+        return True
+    return bool(await db.scalar(
+        text("SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)"),
+        {"lsn": _format_lsn(_required_lsn)}))
+
+
+def _is_valid(scope, sequence: int) -> bool:
+    return _invalidated.get(scope, _forgotten) <= sequence
+
+
+def _make_etag(body: bytes) -> str:
+    return '"{}"'.format(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in tags or "*" in tags
+
+
+async def cached_response(request: Request, key: tuple,
+                          build: Callable[[], Awaitable[bytes]],
+                          db: AsyncSession,
+                          question_id: int | None = None) -> Response:
+    """
+    db 는 build 가 사용하는 세션 (복제본이면 마지막 알림을 재생했을 때만 저장)
+    question_id 가 있으면 해당 질문 상세, 없으면 목록으로 무효화된다
+    """
+    _ensure_listener()
+    scope = LIST_SCOPE if question_id is None else question_id
+    cached = _responses.get(key)
+    if _listening and cached and cached[0] > time.monotonic() and \
+            _is_valid(cached[1], cached[2]):
+        _responses.move_to_end(key)
+        body, etag = cached[3], cached[4]
+    else:
+        sequence = _sequence
+        # 마지막 쓰기를 아직 재생하지 못한 복제본의 본문은 TTL 동안 고정되지
+        # 않도록 저장하지 않음 (복제 재생 순서상 이후 조회는 그 이후를 봄)
+        cacheable = _listening and await _replica_caught_up(db)
+        body = await build()
+        etag = _make_etag(body)
+        if cacheable and _listening and _is_valid(scope, sequence):
+            _responses[key] = (
+                time.monotonic() + settings.RESPONSE_CACHE_TTL_SECONDS,
+                scope, sequence, body, etag)
+            _responses.move_to_end(key)
+            while len(_responses) > settings.RESPONSE_CACHE_MAX_SIZE:
+                _responses.popitem(last=False)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json",
+                    headers=headers)
@@ -1,80 +1,250 @@
+import base64
+import hashlib
+import json
+import time
 from datetime import datetime
 
-from domain.question.question_schema import QuestionCreate, QuestionUpdate
-from models import Question, User, Answer
-from sqlalchemy.orm import Session
-from sqlalchemy import select, and_
+from domain.question import question_cache
+from domain.question.question_schema import (
+    QuestionCreate,
+    QuestionSort,
+    QuestionUpdate,
+)
+from models import Question, User, Answer, question_voter
+from domain.user import user_schema
+from settings import get_settings
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, joinedload, aliased
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import select, update, func, tuple_
+
+settings = get_settings()
+
+# keyword 별 (만료시각, 전체건수)
+TOTAL_CACHE_MAX_KEYWORDS = 1000
+# pg_trgm 은 3글자 미만 검색어에서 trigram 을 만들지 못해 GIN 인덱스를 쓸 수 없다
+TRIGRAM_MIN_KEYWORD = 3
+_total_cache: dict[str, tuple[float, int]] = {}
+
+
+def _question_loader_options():
+    # AsyncSession 은 lazy loading 을 지원하지 않으므로 상세 스키마가 필요로
+    # 하는 관계를 미리 로드한다. 단건 관계는 joinedload, 컬렉션은
+    # selectinload 로 답변 수와 무관하게 쿼리 수를 고정한다.
+    return (
+        joinedload(Question.user),
+        selectinload(Question.voter),
+        selectinload(Question.answers).options(
+            joinedload(Answer.user),
+            selectinload(Answer.voter),
+        ),
+    )
 
 
-def get_question_list(db: Session, skip: int = 0, limit: int = 10,
-                      keyword: str = ''):
-    question_list = db.query(Question)
+def _cursor_fingerprint(sort: str, keyword: str) -> str:
+    # cursor 는 만든 정렬/검색어에서만 유효 (정렬 키 구성이 다름)
+    return hashlib.sha1(f"{sort}\0{keyword}".encode()).hexdigest()[:12]
+
+
+def _encode_cursor(values: list, fingerprint: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps(
+        {"f": fingerprint, "v": values}, default=str).encode()).decode()
+
+
+def _decode_cursor(cursor: str, fingerprint: str, size: int) -> list:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        values = data["v"]
+        valid = data["f"] == fingerprint and len(values) == size
+    except (ValueError, TypeError, KeyError):
+        valid = False
+    if not valid:
+        raise ValueError("잘못된 cursor 입니다.")
+    try:
+        *leading, create_date, question_id = values
+        if not all(isinstance(v, (int, float)) for v in leading):
+            raise ValueError
+        return [*leading,
+                datetime.fromisoformat(create_date), int(question_id)]
+    except (ValueError, TypeError):
+        raise ValueError("잘못된 cursor 입니다.")
+
+
+async def _get_question_total(db: AsyncSession, question_list, keyword: str,
+                              limit: int | None = None):
+    # 전체 건수는 페이지마다 바뀌지 않으므로 짧은 시간 동안 캐시한다
+    cached = _total_cache.get(keyword)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    if limit:
+        # 인덱스를 못 쓰는 검색은 limit 건까지만 센다
+        question_list = question_list.limit(limit)
+    total = await db.scalar(
+        select(func.count()).select_from(question_list.subquery()))
+    if len(_total_cache) >= TOTAL_CACHE_MAX_KEYWORDS:
+        _total_cache.clear()
+    _total_cache[keyword] = (
+        time.monotonic() + settings.QUESTION_TOTAL_CACHE_SECONDS, total)
+    return total
+
+
+# as_rows 모드에서 ORM 객체 대신 조회하는 목록 컬럼
+_LIST_COLUMNS = (
+    Question.id, Question.subject, Question.create_date,
+    Question.modify_date, Question.answer_count, Question.vote_count,
+    User.id.label('user_id'), User.username, User.email,
+)
+
+
+def _list_row_to_dict(row) -> dict:
+    return {
+        'id': row.id,
+        'subject': row.subject,
+        'create_date': row.create_date,
+        'user': {
+            'id': row.user_id,
+            'username': row.username,
+            'email': row.email,
+        } if row.user_id is not None else None,
+        'modify_date': row.modify_date,
+        'answer_count': row.answer_count,
+        'vote_count': row.vote_count,
+    }
+
+
+async def get_question_list(db: AsyncSession, skip: int = 0, limit: int = 10,
+                            keyword: str = '', cursor: str | None = None,
+                            sort: QuestionSort = 'recent',
+                            as_rows: bool = False):
+    conditions = []
+    sort_keys = [Question.create_date, Question.id]
+    trigram = len(keyword) >= TRIGRAM_MIN_KEYWORD
+    if sort == 'popular':
+        sort_keys.insert(0, Question.vote_count)
+    elif trigram:
+        # 검색어가 있으면 유사도 순으로 정렬
+        sort_keys.insert(
+            0, func.word_similarity(keyword, Question.search_text))
     if keyword:
+        # 3글자 이상이면 search_text 의 pg_trgm GIN 인덱스 사용,
+        # 짧은 검색어는 정렬 인덱스를 따라가며 limit 건을 채우면 멈춘다
         search = '%%{}%%'.format(keyword)
-        sub_query = db.query(
-            Answer.question_id,
-            Answer.content,
-            User.username
-        ).outerjoin(
-            User,
-            and_(Answer.user_id == User.id)
-        ).subquery()
-
-        question_list = question_list.outerjoin(
-            User
-        ).outerjoin(
-            sub_query,
-            and_(sub_query.c.question_id == Question.id)
-        ).filter(
-            Question.subject.ilike(search) |
-            Question.content.ilike(search) |
-            User.username.ilike(search) |
-            sub_query.c.content.ilike(search) |
-            sub_query.c.username.ilike(search)
-        )
-
-    total = question_list.distinct().count()
-    question_list = question_list.order_by(Question.create_date.desc()).offset(
-        skip * limit).limit(limit).distinct().all()
-    return total, question_list
-
-
-async def get_async_quest_list(db: Session):
-    data = await db.execute(select(Question).order_by(
-        Question.create_date.desc()).limit(10))
-    return data.all()
-
-
-def get_question(db: Session, question_id: int):
-    question = db.query(Question).get(question_id)
+        conditions.append(Question.search_text.ilike(search))
+
+    question_list = select(Question).filter(*conditions)
+    total = await _get_question_total(
+        db, question_list, keyword,
+        limit=None if trigram or not keyword
+        else settings.QUESTION_SHORT_KEYWORD_TOTAL_LIMIT)
+
+    # 목록 스키마는 작성자와 카운터만 필요하므로 컬렉션은 로드하지 않는다
+    if as_rows:
+        # ORM 객체와 스키마 검증을 거치지 않고 직렬화할 dict 를 바로 만든다
+        page = select(*_LIST_COLUMNS).outerjoin(
+            User, Question.user_id == User.id).filter(*conditions)
+    else:
+        page = question_list.options(joinedload(Question.user))
+    page = page.add_columns(*sort_keys).order_by(
+        *[key.desc() for key in sort_keys]).limit(limit)
+    fingerprint = _cursor_fingerprint(sort, keyword)
+    if cursor:
+        # 정렬 키 기준 키셋 페이지네이션: offset 없이 인덱스를 탐색
+        page = page.filter(tuple_(*sort_keys) < tuple_(
+            *_decode_cursor(cursor, fingerprint, len(sort_keys))))
+    else:
+        page = page.offset(skip * limit)
+
+    rows = (await db.execute(page)).all()
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = _encode_cursor(list(rows[-1][-len(sort_keys):]),
+                                     fingerprint)
+    if as_rows:
+        return total, [_list_row_to_dict(row) for row in rows], next_cursor
+    return total, [row[0] for row in rows], next_cursor
+
+
+def invalidate_question_total():
+    _total_cache.clear()
+
+
+async def refresh_search_text(db: AsyncSession, question_id: int):
+    """질문의 검색용 텍스트를 현재 질문/답변 내용으로 다시 계산"""
+    author = select(User.username).where(
+        User.id == Question.user_id).scalar_subquery()
+    answer_user = aliased(User)
+    answers = select(
+        func.string_agg(
+            func.concat_ws(' ', Answer.content, answer_user.username), ' ')
+    ).select_from(Answer).outerjoin(
+        answer_user, Answer.user_id == answer_user.id
+    ).where(Answer.question_id == Question.id).scalar_subquery()
+
+    await db.execute(
+        update(Question).where(Question.id == question_id).values(
+            search_text=func.concat_ws(' ', Question.subject,
+                                       Question.content, author, answers)
+        ).execution_options(synchronize_session=False))
+
+
+async def get_question(db: AsyncSession, question_id: int,
+                       with_relations: bool = True):
+    if not with_relations:
+        return await db.get(Question, question_id)
+    question = await db.get(Question, question_id,
+                            options=_question_loader_options(),
+                            populate_existing=True)
     return question
 
 
-def create_question(db: Session, question_create: QuestionCreate, user: User):
+async def create_question(db: AsyncSession, question_create: QuestionCreate,
+                          user: user_schema.User):
     db_question = Question(
         subject=question_create.subject,
         content=question_create.content,
         create_date=datetime.now(),
-        user=user
+        user_id=user.id
     )
     db.add(db_question)
-    db.commit()
+    await db.flush()
+    await refresh_search_text(db, db_question.id)
+    await db.commit()
+    invalidate_question_total()
+    await question_cache.publish_change(db, db_question.id)
 
 
-def update_question(db: Session, db_question: Question,
-                    question_update: QuestionUpdate):
+async def update_question(db: AsyncSession, db_question: Question,
+                          question_update: QuestionUpdate):
     db_question.subject = question_update.subject
     db_question.content = question_update.content
     db_question.modify_date = datetime.now()
     db.add(db_question)
-    db.commit()
-
-
-def delete_question(db: Session, db_question: Question):
-    db.delete(db_question)
-    db.commit()
-
-
-def vote_question(db: Session, db_question: Question, db_user: User):
-    db_question.voter.append(db_user)
-    db.commit()
+    await db.flush()
+    await refresh_search_text(db, db_question.id)
+    await db.commit()
+    await question_cache.publish_change(db, db_question.id)
+
+
+async def delete_question(db: AsyncSession, db_question: Question):
+    await db.delete(db_question)
+    await db.commit()
+    invalidate_question_total()
+    await question_cache.publish_change(db, db_question.id)
+
+
+async def vote_question(db: AsyncSession, db_question: Question,
+                        db_user: user_schema.User):
+    # 기존 추천자 목록을 로드하지 않고 중복 추천은 DB 에서 무시한다
+    result = await db.execute(
+        insert(question_voter).values(
+            user_id=db_user.id, question_id=db_question.id
+        ).on_conflict_do_nothing())
+    if result.rowcount:
+        await db.execute(
+            update(Question).where(Question.id == db_question.id).values(
+                vote_count=Question.vote_count + 1
+            ).execution_options(synchronize_session=False))
+    await db.commit()
+    if result.rowcount:
+        # 중복 추천은 바뀐 데이터가 없으므로 캐시를 무효화하지 않음
+        await question_cache.publish_change(db, db_question.id)
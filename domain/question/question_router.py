@@ -1,91 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from db.postgres import get_db
-from domain.question import question_schema, question_crud
+from db.postgres import get_async_db, get_async_read_db, remember_write
+from settings import get_settings
+from domain.question import question_schema, question_crud, question_cache
 from domain.user.user_router import get_current_user
-from models import User
+from domain.user.user_schema import User
+
+settings = get_settings()
+FAST_JSON = settings.FAST_JSON_RESPONSES and orjson is not None
 
 router = APIRouter(
     prefix="/api/question",
+    dependencies=[Depends(remember_write)],
 )
 
 
 @router.get("/list", response_model=question_schema.QuestionList)
-def question_list(db: Session = Depends(get_db),
-                  page: int = 0, size: int = 10, keyword: str = ''):
-    total, _question_list = question_crud.get_question_list(
-        db, skip=page, limit=size, keyword=keyword)
-    return {
-        'total': total,
-        'question_list': _question_list
-    }
+async def question_list(request: Request,
+                        db: AsyncSession = Depends(get_async_read_db),
+                        page: int = 0, size: int = 10, keyword: str = '',
+                        cursor: str | None = None,
+                        sort: question_schema.QuestionSort = 'recent'):
+    async def build():
+        try:
+            total, _question_list, next_cursor = \
+                await question_crud.get_question_list(
+                    db, skip=page, limit=size, keyword=keyword,
+                    cursor=cursor, sort=sort, as_rows=FAST_JSON)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=str(e))
+        if FAST_JSON:
+            return orjson.dumps({
+                'total': total,
+                'question_list': _question_list,
+                'next_cursor': next_cursor
+            })
+        return question_schema.QuestionList.model_validate({
+            'total': total,
+            'question_list': _question_list,
+            'next_cursor': next_cursor
+        }, from_attributes=True).model_dump_json().encode()
+
+    return await question_cache.cached_response(
+        request, ("list", page, size, keyword, cursor, sort), build, db)
 
 
 @router.get("/detail/{question_id}", response_model=question_schema.Question)
-def question_detail(question_id: int, db: Session = Depends(get_db)):
-    question = question_crud.get_question(db, question_id=question_id)
-    return question
-
+async def question_detail(request: Request, question_id: int,
+                          db: AsyncSession = Depends(get_async_read_db)):
+    async def build():
+        question = await question_crud.get_question(
+            db, question_id=question_id)
+        if not question:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail="데이터를 찾을 수 없습니다.")
+        return question_schema.Question.model_validate(
+            question, from_attributes=True).model_dump_json().encode()
 
-# @router.get("/async_list")
-# async def async_question_list(db: Session = Depends(get_async_db)):
-#     result = await question_crud.get_async_quest_list(db)
-#     return result
+    return await question_cache.cached_response(
+        request, ("detail", question_id), build, db, question_id=question_id)
 
 
 @router.post("/create", status_code=status.HTTP_204_NO_CONTENT)
-def question_create(_question_create: question_schema.QuestionCreate,
-                    db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_user)):
+async def question_create(_question_create: question_schema.QuestionCreate,
+                          db: AsyncSession = Depends(get_async_db),
+                          current_user: User = Depends(get_current_user)):
     # create question
-    question_crud.create_question(
+    await question_crud.create_question(
         db=db, question_create=_question_create, user=current_user)
 
 
 @router.put("/update", status_code=status.HTTP_204_NO_CONTENT)
-def question_update(_question_update: question_schema.QuestionUpdate,
-                    db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_user)):
-    db_question = question_crud.get_question(
-        db, question_id=_question_update.question_id)
+async def question_update(_question_update: question_schema.QuestionUpdate,
+                          db: AsyncSession = Depends(get_async_db),
+                          current_user: User = Depends(get_current_user)):
+    db_question = await question_crud.get_question(
+        db, question_id=_question_update.question_id, with_relations=False)
 
     if not db_question:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="데이터를 찾을 수 없습니다.")
-    if current_user.id != db_question.user.id:
+    if current_user.id != db_question.user_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="수정 권한이 없습니다.")
-    question_crud.update_question(db=db, db_question=db_question,
-                                  question_update=_question_update)
+    await question_crud.update_question(db=db, db_question=db_question,
+                                        question_update=_question_update)
 
 
 @router.delete("/delete", status_code=status.HTTP_204_NO_CONTENT)
-def question_delete(_question_delete: question_schema.QuestionDelete,
-                    db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_user)):
-    db_question = question_crud.get_question(
+async def question_delete(_question_delete: question_schema.QuestionDelete,
+                          db: AsyncSession = Depends(get_async_db),
+                          current_user: User = Depends(get_current_user)):
+    db_question = await question_crud.get_question(
         db, question_id=_question_delete.question_id)
 
     if not db_question:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="데이터를 찾을 수 없습니다.")
-    if current_user.id != db_question.user.id:
+    if current_user.id != db_question.user_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="삭제 권한이 없습니다.")
-    question_crud.delete_question(db=db, db_question=db_question)
+    await question_crud.delete_question(db=db, db_question=db_question)
 
 
 @router.post("/vote", status_code=status.HTTP_204_NO_CONTENT)
-def question_vote(_question_vote: question_schema.QuestionVote,
-                  db: Session = Depends(get_db),
-                  current_user: User = Depends(get_current_user)):
-    db_question = question_crud.get_question(
-        db, question_id=_question_vote.question_id)
+async def question_vote(_question_vote: question_schema.QuestionVote,
+                        db: AsyncSession = Depends(get_async_db),
+                        current_user: User = Depends(get_current_user)):
+    db_question = await question_crud.get_question(
+        db, question_id=_question_vote.question_id, with_relations=False)
 
     if not db_question:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="데이터를 찾을 수 없습니다.")
-    question_crud.vote_question(
+    await question_crud.vote_question(
         db, db_question=db_question, db_user=current_user)
@@ -1,10 +1,14 @@
 import datetime
+from typing import Literal
 
 from pydantic import BaseModel, field_validator
 
 from domain.answer.answer_schema import Answer
 from domain.user.user_schema import User
 
+# 질문 목록 정렬 (recent: 최신순/검색 시 유사도순, popular: 추천순)
+QuestionSort = Literal['recent', 'popular']
+
 
 class QuestionCreate(BaseModel):
     subject: str
@@ -26,11 +30,24 @@ class Question(BaseModel):
     user: User | None
     modify_date: datetime.datetime | None = None
     voter: list[User] = []
+    answer_count: int = 0
+    vote_count: int = 0
+
+
+class QuestionListItem(BaseModel):
+    id: int
+    subject: str
+    create_date: datetime.datetime
+    user: User | None
+    modify_date: datetime.datetime | None = None
+    answer_count: int = 0
+    vote_count: int = 0
 
 
 class QuestionList(BaseModel):
     total: int = 0
-    question_list: list[Question] = []
+    question_list: list[QuestionListItem] = []
+    next_cursor: str | None = None
 
 
 class QuestionUpdate(QuestionCreate):
@@ -0,0 +1,41 @@
+import time
+from collections import OrderedDict
+
+from domain.user.user_schema import User
+from settings import get_settings
+
+settings = get_settings()
+
+'''
+인증된 사용자 캐시
+
+get_current_user 가 요청마다 DB 를 조회하지 않도록 username 기준으로
+사용자 정보를 짧은 시간 동안 보관한다. ORM 객체는 세션에 묶여 있으므로
+세션과 무관한 user_schema.User 로 저장한다.
+'''
+
+# username -> (만료시각, User)
+_users: OrderedDict[str, tuple[float, User]] = OrderedDict()
+
+
+def get(username: str) -> User | None:
+    cached = _users.get(username)
+    if cached is None:
+        return None
+    if cached[0] <= time.monotonic():
+        _users.pop(username, None)
+        return None
+    _users.move_to_end(username)
+    return cached[1]
+
+
+def put(user: User):
+    _users[user.username] = (
+        time.monotonic() + settings.USER_CACHE_TTL_SECONDS, user)
+    _users.move_to_end(user.username)
+    while len(_users) > settings.USER_CACHE_MAX_SIZE:
+        _users.popitem(last=False)
+
+
+def invalidate(username: str):
+    _users.pop(username, None)
@@ -1,25 +1,36 @@
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from domain.user import user_cache
+from domain.user.user_password import hash_password
 from domain.user.user_schema import UserCreate
 from models import User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-
-def create_user(db: Session, user_create: UserCreate):
+async def create_user(db: AsyncSession, user_create: UserCreate):
     db_user = User(username=user_create.username,
-                   password=pwd_context.hash(user_create.password1),
+                   password=await hash_password(user_create.password1),
                    email=user_create.email)
     db.add(db_user)
-    db.commit()
+    await db.commit()
+    user_cache.invalidate(db_user.username)
 
 
-def get_existing_user(db: Session, user_create: UserCreate):
-    return db.query(User).filter(
+async def get_existing_user(db: AsyncSession, user_create: UserCreate):
+    return await db.scalar(select(User).filter(
         (User.username == user_create.username) |
         (User.email == user_create.email)
-    ).first()
+    ).limit(1))
+
+
+async def get_user(db: AsyncSession, username: str):
+    return await db.scalar(
+        select(User).filter(User.username == username).limit(1))
+
+
+async def update_password(db: AsyncSession, db_user: User, password: str):
+    db_user.password = password
+    await db.commit()
 
 
-def get_user(db: Session, username: str):
-    return db.query(User).filter(User.username == username).first()
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
@@ -0,0 +1,96 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from settings import get_settings
+
+settings = get_settings()
+
+'''
+bcrypt 해시/검증 전용 프로세스 풀
+
+bcrypt 는 CPU 작업이라 로그인이 몰리면 요청 스레드풀을 점유한다.
+별도 프로세스 풀에서 수행하고 세마포어로 동시 실행 수를 제한하며,
+대기열 길이를 get_stats() 로 노출한다.
+'''
+
+_rounds = settings.PASSWORD_BCRYPT_ROUNDS
+# 비용(rounds)이 바뀌면 needs_update 가 참이 되어 로그인 시 재해시된다
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",
+                           bcrypt__default_rounds=_rounds,
+                           bcrypt__min_rounds=_rounds,
+                           bcrypt__max_rounds=_rounds)
+
+_executor: ProcessPoolExecutor | None = None
+_semaphore: asyncio.Semaphore | None = None
+_stats = {
+    "waiting": 0,
+    "running": 0,
+    "max_waiting": 0,
+    "completed": 0,
+    "rehashed": 0,
+}
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str):
+    return pwd_context.verify_and_update(password, hashed)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS)
+    return _executor
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_CONCURRENCY)
+    return _semaphore
+
+
+async def _run(func, *args):
+    _stats["waiting"] += 1
+    _stats["max_waiting"] = max(_stats["max_waiting"], _stats["waiting"])
+    acquired = False
+    try:
+        async with _get_semaphore():
+            acquired = True
+            _stats["waiting"] -= 1
+            _stats["running"] += 1
+            try:
+                # PASSWORD_HASH_WORKERS=0 이면 프로세스 풀 대신 스레드풀 사용
+                if settings.PASSWORD_HASH_WORKERS <= 0:
+                    return await run_in_threadpool(func, *args)
+                return await asyncio.get_running_loop().run_in_executor(
+                    _get_executor(), func, *args)
+            finally:
+                _stats["running"] -= 1
+                _stats["completed"] += 1
+    finally:
+        if not acquired:
+            _stats["waiting"] -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, hashed: str):
+    """비밀번호 검증. (일치여부, 재해시가 필요하면 새 해시) 반환"""
+    verified, new_hash = await _run(_verify_and_update, password, hashed)
+    if new_hash:
+        _stats["rehashed"] += 1
+    return verified, new_hash
+
+
+def get_stats() -> dict:
+    return dict(_stats)
@@ -4,12 +4,13 @@ from fastapi import APIRouter, HTTPException
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from db.postgres import get_db
-from domain.user import user_crud, user_schema
-from domain.user.user_crud import pwd_context
+from db.postgres import get_async_db
+from domain.user import user_crud, user_schema, user_cache
+from domain.user.user_password import verify_password
+from settings import get_settings
 from starlette.config import Config
 
 config = Config('.env')
@@ -17,6 +18,8 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(config('ACCESS_TOKEN_EXPIRE_MINUTES'))
 SECRET_KEY = config('SECRET_KEY')
 ALGORITHM = "HS256"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/user/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/user/login",
+                                              auto_error=False)
 
 router = APIRouter(
     prefix="/api/user"
@@ -24,18 +27,27 @@ router = APIRouter(
 
 
 @router.post("/login", response_model=user_schema.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(),
-                           db: Session = Depends(get_db)):
-    user = user_crud.get_user(db, form_data.username)
-    if not user or not pwd_context.verify(form_data.password, user.password):
+async def login_for_access_token(
+        form_data: OAuth2PasswordRequestForm = Depends(),
+        db: AsyncSession = Depends(get_async_db)):
+    user = await user_crud.get_user(db, form_data.username)
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await verify_password(form_data.password,
+                                                   user.password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # 해시 비용이 변경된 경우 로그인 시점에 재해시하여 저장
+        await user_crud.update_password(db, user, new_hash)
 
     data = {
         "sub": user.username,
+        "uid": user.id,
         "exp": datetime.utcnow() + timedelta(
             minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     }
@@ -49,17 +61,17 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(),
 
 
 @router.post("/create", status_code=status.HTTP_204_NO_CONTENT)
-def user_create(_user_create: user_schema.UserCreate,
-                db: Session = Depends(get_db)):
-    user = user_crud.get_existing_user(db, user_create=_user_create)
+async def user_create(_user_create: user_schema.UserCreate,
+                      db: AsyncSession = Depends(get_async_db)):
+    user = await user_crud.get_existing_user(db, user_create=_user_create)
     if user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT,
                             detail="이미 존재하는 사용자입니다.")
-    user_crud.create_user(db=db, user_create=_user_create)
+    await user_crud.create_user(db=db, user_create=_user_create)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme),
-                     db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme),
+                           db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -72,8 +84,41 @@ def get_current_user(token: str = Depends(oauth2_scheme),
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    else:
-        user = user_crud.get_user(db, username=username)
-        if user is None:
-            raise credentials_exception
+
+    user = user_cache.get(username)
+    if user is not None:
         return user
+
+    # uid 클레임이 있으면 기본키로 조회
+    user_id = payload.get("uid")
+    if user_id is not None:
+        db_user = await user_crud.get_user_by_id(db, user_id=user_id)
+        if db_user is not None and db_user.username != username:
+            db_user = None
+    else:
+        db_user = await user_crud.get_user(db, username=username)
+    if db_user is None:
+        raise credentials_exception
+
+    user = user_schema.User.model_validate(db_user, from_attributes=True)
+    user_cache.put(user)
+    return user
+
+
+async def get_optional_user(token: str | None = Depends(optional_oauth2_scheme),
+                            db: AsyncSession = Depends(get_async_db)):
+    """토큰이 있으면 사용자, 없으면 None (비로그인 허용 엔드포인트용)"""
+    if token is None:
+        return None
+    return await get_current_user(token, db)
+
+
+async def get_admin_user(current_user: user_schema.User = Depends(
+        get_current_user)):
+    """관리자(ADMIN_USERNAMES)만 허용"""
+    admins = {name.strip() for name in
+              get_settings().ADMIN_USERNAMES.split(",") if name.strip()}
+    if current_user.username not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="권한이 없습니다.")
+    return current_user
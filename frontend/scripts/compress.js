@@ -0,0 +1,40 @@
+// 빌드 결과물의 brotli/gzip 사전 압축본(.br/.gz)을 같은 위치에 생성
+// 서버(main.py 또는 nginx gzip_static/brotli_static)는 압축하지 않고 그대로 전송
+// 압축본은 저장소에 커밋하지 않고 빌드할 때마다 생성 (frontend/.gitignore)
+import { readdirSync, readFileSync, rmSync, statSync, writeFileSync } from 'node:fs'
+import { extname, join } from 'node:path'
+import { brotliCompressSync, constants, gzipSync } from 'node:zlib'
+
+const COMPRESSIBLE = new Set(['.js', '.css', '.html', '.svg', '.json', '.txt', '.map'])
+const MIN_SIZE = 1024
+
+function* walk(dir) {
+  for (const name of readdirSync(dir)) {
+    const path = join(dir, name)
+    if (statSync(path).isDirectory()) yield* walk(path)
+    else yield path
+  }
+}
+
+const outDir = process.argv[2] ?? 'dist'
+for (const path of [...walk(outDir)]) {
+  if (!COMPRESSIBLE.has(extname(path))) continue
+  // 이전 실행의 압축본은 원본과 어긋날 수 있으므로 항상 새로 만듦
+  rmSync(path + '.br', { force: true })
+  rmSync(path + '.gz', { force: true })
+  const data = readFileSync(path)
+  if (data.length < MIN_SIZE) continue
+  const variants = {
+    '.br': brotliCompressSync(data, {
+      params: {
+        [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+        [constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+      },
+    }),
+    '.gz': gzipSync(data, { level: 9 }),
+  }
+  for (const [suffix, compressed] of Object.entries(variants)) {
+    // 압축 이득이 없으면 만들지 않음 (서버는 원본으로 대체)
+    if (compressed.length < data.length) writeFileSync(path + suffix, compressed)
+  }
+}
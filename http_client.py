@@ -0,0 +1,101 @@
+from functools import lru_cache
+
+import httpx
+
+import metrics
+from settings import get_settings
+
+'''
+OpenAI 호출용 공유 HTTP 클라이언트
+
+ChatOpenAI/OpenAIEmbeddings 가 각자 클라이언트를 만들지 않도록 프로세스당
+동기/비동기 httpx 클라이언트를 하나씩 두고 keep-alive 커넥션을 재사용한다.
+h2 패키지가 설치되어 있으면 HTTP/2 로 한 커넥션에 요청을 다중화한다.
+요청마다 TCP 연결을 새로 맺었는지 기록해 커넥션 재사용률을 메트릭으로 노출한다.
+'''
+
+settings = get_settings()
+
+http_client_requests = metrics.Counter(
+    "http_client_requests_total",
+    "Outbound HTTP requests by whether a new connection was opened",
+    ("client", "connection"))
+
+_NEW_CONNECTION = "pybo.new_connection"
+
+
+def _http2_enabled() -> bool:
+    if not settings.OPENAI_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.OPENAI_HTTP_TIMEOUT_SECONDS,
+                         connect=settings.OPENAI_HTTP_CONNECT_TIMEOUT_SECONDS)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.OPENAI_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.OPENAI_HTTP_KEEPALIVE_SECONDS)
+
+
+def _record(client: str, response: httpx.Response):
+    connection = "new" if response.request.extensions.get(_NEW_CONNECTION) \
+        else "reused"
+    http_client_requests.inc(client=client, connection=connection)
+
+
+def _trace_request(request: httpx.Request):
+    """httpcore trace 로 새 TCP 연결 여부를 요청에 표시"""
+    def trace(event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            request.extensions[_NEW_CONNECTION] = True
+    request.extensions["trace"] = trace
+
+
+def _trace_async_request(request: httpx.Request):
+    async def trace(event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            request.extensions[_NEW_CONNECTION] = True
+    request.extensions["trace"] = trace
+
+
+@lru_cache()
+def get_http_client() -> httpx.Client:
+    """동기 호출용 공유 클라이언트"""
+    return httpx.Client(
+        http2=_http2_enabled(), limits=_limits(), timeout=get_timeout(),
+        event_hooks={
+            "request": [_trace_request],
+            "response": [lambda response: _record("sync", response)],
+        })
+
+
+@lru_cache()
+def get_async_http_client() -> httpx.AsyncClient:
+    """비동기 호출용 공유 클라이언트"""
+    async def record(response: httpx.Response):
+        _record("async", response)
+
+    async def trace_request(request: httpx.Request):
+        _trace_async_request(request)
+
+    return httpx.AsyncClient(
+        http2=_http2_enabled(), limits=_limits(), timeout=get_timeout(),
+        event_hooks={"request": [trace_request], "response": [record]})
+
+
+def openai_client_kwargs() -> dict:
+    """LangChain OpenAI 모델/임베딩 생성 인자 (공유 클라이언트와 타임아웃)"""
+    return {
+        "http_client": get_http_client(),
+        "http_async_client": get_async_http_client(),
+        "request_timeout": get_timeout(),
+    }
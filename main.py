@@ -1,15 +1,19 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import FileResponse
-from starlette.staticfiles import StaticFiles
+from starlette.responses import PlainTextResponse
+
+import metrics
+from static_files import IMMUTABLE_CACHE_CONTROL, PrecompressedStaticFiles
 
 from domain.question import question_router
 from domain.answer import answer_router
 from domain.user import user_router
-from domain.chat import chat_router
-from domain.doc import document_router
-from domain.sql import sql_router
+from domain.user import user_password
+from settings import get_settings
 
+settings = get_settings()
 app = FastAPI()
 
 origins = [
@@ -25,6 +29,40 @@ app.add_middleware(
 )
 
 
+password_hash_jobs = metrics.Gauge(
+    "password_hash_jobs", "bcrypt jobs by state", ("state",))
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    query_count = [0]
+    token = metrics.request_query_count.set(query_count)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # 경로 파라미터가 포함되지 않도록 라우트 템플릿을 라벨로 사용
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        metrics.http_request_duration.observe(
+            time.perf_counter() - start, method=request.method,
+            route=route_path, status=status_code)
+        metrics.http_request_db_queries.observe(
+            query_count[0], route=route_path)
+        metrics.request_query_count.reset(token)
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    for state, value in user_password.get_stats().items():
+        password_hash_jobs.set(value, state=state)
+    return PlainTextResponse(metrics.render(),
+                             media_type="text/plain; version=0.0.4")
+
+
 @app.get("/hello")
 def hello():
     return {"message": "안녕하세요 파이보"}
@@ -33,12 +71,23 @@ def hello():
 app.include_router(question_router.router)
 app.include_router(answer_router.router)
 app.include_router(user_router.router)
-app.include_router(chat_router.router)
-app.include_router(document_router.router)
-app.include_router(sql_router.router)
-app.mount("/assets", StaticFiles(directory="frontend/dist/assets"))
-
+# 기능 플래그로 끈 라우터는 모듈 자체를 import 하지 않음
+if settings.ENABLE_CHAT:
+    from domain.chat import chat_router
+    app.include_router(chat_router.router)
+if settings.ENABLE_DOCUMENTS:
+    from domain.doc import document_router
+    app.include_router(document_router.router)
+if settings.ENABLE_SQL:
+    from domain.sql import sql_router
+    app.include_router(sql_router.router)
+if settings.SERVE_STATIC:
+    # 해시가 붙은 번들은 1년 immutable, index.html 은 매번 재검증
+    app.mount("/assets", PrecompressedStaticFiles(
+        directory="frontend/dist/assets",
+        cache_control=IMMUTABLE_CACHE_CONTROL))
+    frontend_files = PrecompressedStaticFiles(directory="frontend/dist")
 
-@app.get("/")
-def index():
-    return FileResponse("frontend/dist/index.html")
+    @app.get("/", include_in_schema=False)
+    async def index(request: Request):
+        return await frontend_files.get_response("index.html", request.scope)
@@ -0,0 +1,172 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+from sqlalchemy import event
+
+'''
+Prometheus 텍스트 포맷 메트릭
+
+외부 의존성 없이 Counter/Histogram 을 프로세스 메모리에 집계하고
+/metrics 엔드포인트에서 render() 결과를 그대로 노출한다.
+'''
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = ['{}="{}"'.format(name, str(value).replace('"', '\\"'))
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self, metric_type: str = "counter") -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {metric_type}"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append("{}{} {}".format(
+                    self.name, _format_labels(self.labelnames, key), value))
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self, metric_type: str = "gauge") -> list[str]:
+        return super().render(metric_type)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # key -> [버킷별 카운트..., 합계, 개수]
+        self._values: dict[tuple, list] = {}
+        self._lock = Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 2)
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, data in self._values.items():
+                cumulative = 0
+                for bucket, count in zip(self.buckets, data):
+                    cumulative += count
+                    lines.append("{}_bucket{} {}".format(
+                        self.name,
+                        _format_labels(self.labelnames, key,
+                                       f'le="{bucket}"'),
+                        cumulative))
+                lines.append("{}_bucket{} {}".format(
+                    self.name,
+                    _format_labels(self.labelnames, key, 'le="+Inf"'),
+                    data[-1]))
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {data[-2]}")
+                lines.append(f"{self.name}_count{labels} {data[-1]}")
+        return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency",
+    ("method", "route", "status"))
+http_request_db_queries = Histogram(
+    "http_request_db_queries", "DB queries executed per HTTP request",
+    ("route",), buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "DB query latency", ("database",))
+db_read_route = Counter(
+    "db_read_route_total", "Read-only sessions by routed database",
+    ("target",))
+db_replica_lag = Gauge(
+    "db_replica_lag_seconds", "Last measured replication lag (-1: down)",
+    ("replica",))
+external_call_duration = Histogram(
+    "external_call_duration_seconds",
+    "Latency of embedding, LLM and vector search calls", ("call",))
+
+# 요청 단위 DB 쿼리 수. 요청 미들웨어가 [0] 을 넣고 엔진 이벤트가 증가시킨다
+request_query_count: ContextVar[list | None] = ContextVar(
+    "request_query_count", default=None)
+
+
+def instrument_engine(engine, database: str):
+    """SQLAlchemy 엔진에 쿼리 수/지연시간 수집 이벤트 등록"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        db_query_duration.observe(time.perf_counter() - start,
+                                  database=database)
+        counter = request_query_count.get()
+        if counter is not None:
+            counter[0] += 1
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
@@ -0,0 +1,47 @@
+"""question search_text with pg_trgm index
+
+Revision ID: a1c3e5f7b901
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f7b901'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('question', sa.Column('search_text', sa.Text(),
+                                        nullable=True))
+
+    # 기존 데이터 백필 (question_crud.refresh_search_text 와 동일한 식)
+    op.execute("""
+        UPDATE question SET search_text = concat_ws(
+            ' ', question.subject, question.content,
+            (SELECT "user".username FROM "user"
+              WHERE "user".id = question.user_id),
+            (SELECT string_agg(concat_ws(' ', answer.content, u.username),
+                               ' ')
+               FROM answer LEFT OUTER JOIN "user" AS u
+                 ON answer.user_id = u.id
+              WHERE answer.question_id = question.id))
+    """)
+
+    op.create_index('ix_question_search_text_trgm', 'question',
+                    ['search_text'], unique=False,
+                    postgresql_using='gin',
+                    postgresql_ops={'search_text': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_question_search_text_trgm', table_name='question')
+    op.drop_column('question', 'search_text')
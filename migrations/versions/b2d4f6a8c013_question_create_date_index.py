@@ -0,0 +1,26 @@
+"""question (create_date, id) index for keyset pagination
+
+Revision ID: b2d4f6a8c013
+Revises: a1c3e5f7b901
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a8c013'
+down_revision: Union[str, None] = 'a1c3e5f7b901'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_question_create_date_id', 'question',
+                    ['create_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_question_create_date_id', table_name='question')
@@ -0,0 +1,52 @@
+"""denormalized vote/answer counters
+
+Revision ID: c3e5a7b9d125
+Revises: b2d4f6a8c013
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7b9d125'
+down_revision: Union[str, None] = 'b2d4f6a8c013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('question', sa.Column('answer_count', sa.Integer(),
+                                        server_default='0', nullable=False))
+    op.add_column('question', sa.Column('vote_count', sa.Integer(),
+                                        server_default='0', nullable=False))
+    op.add_column('answer', sa.Column('vote_count', sa.Integer(),
+                                      server_default='0', nullable=False))
+
+    # 기존 데이터 백필
+    op.execute("""
+        UPDATE question SET
+            answer_count = (SELECT count(*) FROM answer
+                             WHERE answer.question_id = question.id),
+            vote_count = (SELECT count(*) FROM question_voter
+                           WHERE question_voter.question_id = question.id)
+    """)
+    op.execute("""
+        UPDATE answer SET
+            vote_count = (SELECT count(*) FROM answer_voter
+                           WHERE answer_voter.answer_id = answer.id)
+    """)
+
+    op.create_index('ix_question_vote_count_create_date_id', 'question',
+                    ['vote_count', 'create_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_question_vote_count_create_date_id',
+                  table_name='question')
+    op.drop_column('answer', 'vote_count')
+    op.drop_column('question', 'vote_count')
+    op.drop_column('question', 'answer_count')
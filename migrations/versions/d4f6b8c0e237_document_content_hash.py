@@ -0,0 +1,30 @@
+"""document content hash
+
+Revision ID: d4f6b8c0e237
+Revises: c3e5a7b9d125
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6b8c0e237'
+down_revision: Union[str, None] = 'c3e5a7b9d125'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 기존 문서는 NULL: 다음 처리 시 변경된 청크만 다시 임베딩된다
+    op.add_column('document', sa.Column('content_hash', sa.String(length=64),
+                                        nullable=True))
+    op.create_index('ix_document_content_hash', 'document', ['content_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_document_content_hash', table_name='document')
+    op.drop_column('document', 'content_hash')
@@ -0,0 +1,31 @@
+"""document collection
+
+Revision ID: e5a7c9d1f349
+Revises: d4f6b8c0e237
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c9d1f349'
+down_revision: Union[str, None] = 'd4f6b8c0e237'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 기존 문서는 모두 기본 컬렉션 (merged_db 최상위 인덱스)
+    op.add_column('document', sa.Column('collection', sa.String(length=64),
+                                        nullable=False,
+                                        server_default='default'))
+    op.create_index('ix_document_collection', 'document', ['collection'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_document_collection', table_name='document')
+    op.drop_column('document', 'collection')
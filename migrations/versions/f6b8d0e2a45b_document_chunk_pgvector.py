@@ -0,0 +1,69 @@
+"""document chunk pgvector
+
+Revision ID: f6b8d0e2a45b
+Revises: e5a7c9d1f349
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from db.pgvector import Vector
+from settings import get_settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b8d0e2a45b'
+down_revision: Union[str, None] = 'e5a7c9d1f349'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _pgvector_available() -> bool:
+    return op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'vector'"
+    )).scalar() is not None
+
+
+def upgrade() -> None:
+    # pgvector 확장이 없는 서버는 건너뜀 (VECTOR_STORE_BACKEND=faiss 로만 사용)
+    if not _pgvector_available():
+        return
+    settings = get_settings()
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.create_table(
+        'document_chunk',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('collection', sa.String(length=64), nullable=False),
+        sa.Column('chunk_index', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('embedding', Vector(settings.PGVECTOR_DIMENSION),
+                  nullable=False),
+        sa.ForeignKeyConstraint(
+            ['document_id'], ['document.id'], ondelete='CASCADE',
+            name=op.f('fk_document_chunk_document_id_document')),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_document_chunk')),
+    )
+    op.create_index('ix_document_chunk_document_id', 'document_chunk',
+                    ['document_id'])
+    op.create_index('ix_document_chunk_collection', 'document_chunk',
+                    ['collection'])
+    # FAISS IndexFlatL2 와 같은 L2 거리. IVFFlat 은 빈 테이블에서 학습하면
+    # recall 이 낮으므로 첫 적재 후 만든다 (document_pgvector.ensure_vector_index,
+    # 재생성은 python -m domain.doc.document_pgvector --index ivfflat)
+    if settings.PGVECTOR_INDEX == "hnsw":
+        op.create_index('ix_document_chunk_embedding', 'document_chunk',
+                        ['embedding'], unique=False,
+                        postgresql_using='hnsw',
+                        postgresql_with={
+                            "m": settings.PGVECTOR_HNSW_M,
+                            "ef_construction":
+                                settings.PGVECTOR_HNSW_EF_CONSTRUCTION},
+                        postgresql_ops={'embedding': 'vector_l2_ops'})
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS document_chunk")
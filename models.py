@@ -1,9 +1,13 @@
 from sqlalchemy import (
     Column, Integer, String, Text,
-    DateTime, ForeignKey, Table)
-from sqlalchemy.orm import relationship
+    DateTime, ForeignKey, Table, Index)
+from sqlalchemy.orm import relationship, deferred
 
+from db.pgvector import Vector
 from db.postgres import Base
+from settings import get_settings
+
+settings = get_settings()
 
 question_voter = Table(
     'question_voter',
@@ -32,6 +36,23 @@ class Question(Base):
     modify_date = Column(DateTime, nullable=True)
     voter = relationship('User', secondary=question_voter,
                          backref='question_voters')
+    # 검색용 비정규화 텍스트 (제목, 내용, 작성자, 답변 내용과 답변 작성자)
+    search_text = deferred(Column(Text, nullable=True))
+    # 비정규화 카운터 (answer_crud, question_crud 에서 원자적으로 증감)
+    answer_count = Column(Integer, nullable=False, default=0,
+                          server_default='0')
+    vote_count = Column(Integer, nullable=False, default=0,
+                        server_default='0')
+
+    __table_args__ = (
+        # 목록 정렬 및 키셋 페이지네이션용
+        Index('ix_question_create_date_id', 'create_date', 'id'),
+        Index('ix_question_vote_count_create_date_id',
+              'vote_count', 'create_date', 'id'),
+        Index('ix_question_search_text_trgm', 'search_text',
+              postgresql_using='gin',
+              postgresql_ops={'search_text': 'gin_trgm_ops'}),
+    )
 
 
 class Answer(Base):
@@ -48,6 +69,8 @@ class Answer(Base):
     modify_date = Column(DateTime, nullable=True)
     voter = relationship('User', secondary=answer_voter,
                          backref="answer_voters")
+    vote_count = Column(Integer, nullable=False, default=0,
+                        server_default='0')
 
 
 class User(Base):
@@ -67,4 +90,23 @@ class Document(Base):
     embedding_file = Column(String, unique=True, nullable=False)
     index_file = Column(String, unique=True, nullable=False)
     unique_id = Column(String, unique=True, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)
+    collection = Column(String(64), nullable=False, index=True,
+                        default="default", server_default="default")
     create_date = Column(DateTime, nullable=False)
+
+
+class DocumentChunk(Base):
+    """pgvector 백엔드 청크 (벡터 인덱스는 마이그레이션 또는 첫 적재 후 생성)"""
+    __tablename__ = "document_chunk"
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer,
+                         ForeignKey("document.id", ondelete="CASCADE"),
+                         nullable=False, index=True)
+    document = relationship("Document")
+    collection = Column(String(64), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    embedding = deferred(Column(Vector(settings.PGVECTOR_DIMENSION),
+                                nullable=False))
@@ -16,6 +16,54 @@ class Settings(BaseSettings):
     SECRET_KEY: Optional[str] = None
     ACCESS_TOKEN_EXPIRE_MINUTES: Optional[int] = None
     SQLALCHEMY_DATABASE_URL: Optional[str] = None
+
+    # 기능별 라우터 활성화 (끈 기능의 무거운 의존성은 import 하지 않음)
+    ENABLE_CHAT: bool = True
+    ENABLE_DOCUMENTS: bool = True
+    ENABLE_SQL: bool = True
+
+    # 프론트엔드 정적 파일 서빙 (nginx/CDN 이 frontend/dist 를 서빙하면 false)
+    SERVE_STATIC: bool = True
+
+    # 커넥션 풀 설정
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+
+    # 읽기 전용 복제본 (SQLALCHEMY_DATABASE_URL 과 같은 형식, 쉼표로 구분)
+    # 지연이 REPLICA_MAX_LAG_SECONDS 를 넘거나 응답이 없으면 primary 에서 읽음
+    SQLALCHEMY_REPLICA_URLS: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 5
+    REPLICA_LAG_CHECK_SECONDS: float = 2
+
+    # 질문 목록 전체 건수 캐시 시간(초)
+    QUESTION_TOTAL_CACHE_SECONDS: int = 30
+    # 3글자 미만 검색어(trigram 인덱스 미사용)의 전체 건수 상한
+    QUESTION_SHORT_KEYWORD_TOTAL_LIMIT: int = 10000
+
+    # 질문 목록/상세 응답 캐시
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    RESPONSE_CACHE_MAX_SIZE: int = 1000
+    # 목록 응답을 orjson 으로 직접 직렬화 (Pydantic 검증 생략)
+    FAST_JSON_RESPONSES: bool = False
+
+    # 인증 사용자 캐시 (get_current_user)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    # 비밀번호 해시 (bcrypt) 프로세스 풀
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_CONCURRENCY: int = 4
+
+    # LLM/임베딩 엔드포인트 동시 실행 제한 (워커 프로세스 단위, 0 이면 제한 없음)
+    CHAT_MAX_CONCURRENCY: int = 8
+    CHAT_MAX_QUEUE: int = 32
+    DOC_SEARCH_MAX_CONCURRENCY: int = 16
+    DOC_SEARCH_MAX_QUEUE: int = 64
+    ADMISSION_MAX_WAIT_SECONDS: float = 15
+    ADMISSION_PER_USER_LIMIT: int = 2  # 사용자별 실행 + 대기 요청 수
     TAVILY_API_KEY: Optional[str] = None
     ORGANIZATION_ID: Optional[str] = None
     OPENAI_API_KEY: Optional[str] = None
@@ -26,6 +74,59 @@ class Settings(BaseSettings):
     GOOGLE_API_KEY: Optional[str] = None
     ORACLE_CLIENT_DIR: Optional[str] = None
 
+    # OpenAI 호출용 공유 HTTP 클라이언트 (프로세스당 동기/비동기 각 1개)
+    OPENAI_HTTP_MAX_CONNECTIONS: int = 50
+    OPENAI_HTTP_MAX_KEEPALIVE: int = 20
+    OPENAI_HTTP_KEEPALIVE_SECONDS: float = 60
+    OPENAI_HTTP_TIMEOUT_SECONDS: float = 60
+    OPENAI_HTTP_CONNECT_TIMEOUT_SECONDS: float = 5
+    OPENAI_HTTP2: bool = True  # h2 패키지가 설치된 경우에만 적용
+
+    # 임베딩 백엔드 (openai | local)
+    EMBEDDING_BACKEND: str = "openai"
+    EMBEDDING_MODEL: Optional[str] = None
+    EMBEDDING_DEVICE: str = "cpu"
+    EMBEDDING_LOCAL_RUNTIME: str = "torch"  # torch | onnx
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_THREADS: int = 4
+
+    # 청크 분할 (CHUNK_LENGTH_UNIT=char | token, 크기/겹침은 해당 단위)
+    CHUNK_LENGTH_UNIT: str = "char"
+    CHUNK_SIZE: int = 1000
+    CHUNK_OVERLAP: int = 200
+
+    # 통합 인덱스 청크 중복 제거 (DEDUP_SIMHASH_DISTANCE=0 이면 완전 일치만)
+    DEDUP_CHUNKS: bool = True
+    DEDUP_SIMHASH_DISTANCE: int = 3
+    DEDUP_MIN_CHARS: int = 200
+
+    # 통합 인덱스 pending 의 .done 결과와 failed 배치 보관 시간(초)
+    # (배치를 올린 프로세스가 결과를 읽지 못하고 끝나면 writer 가 정리)
+    MERGE_RESULT_TTL_SECONDS: int = 86400
+
+    # 여러 컬렉션 동시 검색 스레드 수
+    COLLECTION_SEARCH_THREADS: int = 8
+
+    # 벡터 저장소 (faiss: merged_db 파일 | pgvector: document_chunk 테이블)
+    VECTOR_STORE_BACKEND: str = "faiss"
+    PGVECTOR_DIMENSION: int = 1536
+    PGVECTOR_INDEX: str = "hnsw"  # hnsw | ivfflat (ivfflat 은 첫 적재 후 생성)
+    PGVECTOR_HNSW_M: int = 16
+    PGVECTOR_HNSW_EF_CONSTRUCTION: int = 64
+    PGVECTOR_HNSW_EF_SEARCH: int = 40
+    PGVECTOR_IVFFLAT_LISTS: int = 0  # 0 이면 행 수 기준으로 결정
+    PGVECTOR_IVFFLAT_PROBES: int = 10
+    PGVECTOR_COPY_BATCH_ROWS: int = 5000
+
+    # 문서 일괄 처리 (0 이면 프로세스 풀 없이 현재 프로세스에서 파싱)
+    INGEST_WORKERS: int = 4
+    INGEST_EMBED_BATCH_SIZE: int = 256
+    # 임베딩이 끝난 파일을 이 개수씩 통합 인덱스/DB 에 반영 (메모리 상한)
+    INGEST_COMMIT_FILES: int = 200
+    # 일괄 처리 API 가 읽을 수 있는 디렉토리와 호출할 수 있는 사용자(쉼표로 구분)
+    INGEST_ROOT: str = "documents"
+    ADMIN_USERNAMES: str = ""
+
     class Config:
         env_file = ".env"
         case_sensitive = False  # 환경 변수 이름의 대소문자 구분 없앰
@@ -0,0 +1,97 @@
+import mimetypes
+import stat
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+'''
+프론트엔드 정적 파일 서빙
+
+빌드 시 생성한 사전 압축본(frontend/scripts/compress.js 의 .br/.gz)을
+Accept-Encoding 에 맞춰 그대로 보내고(요청마다 압축하지 않음), 경로별
+Cache-Control 을 붙인다. 해시가 붙은 /assets 파일은 내용이 바뀌면 이름이
+바뀌므로 1년 immutable, index.html 은 매번 재검증(no-cache)한다.
+ETag/Last-Modified 조건부 요청(304)은 StaticFiles 의 처리를 따른다.
+
+운영에서는 SERVE_STATIC=false 로 두고 nginx 등 앞단에서 frontend/dist 를
+직접 서빙하면 API 워커가 정적 파일 전송을 맡지 않는다. 예) nginx
+    location /assets/ { gzip_static on; brotli_static on;
+                        add_header Cache-Control "public, max-age=31536000, immutable"; }
+'''
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# 선호 순서
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Accept-Encoding 에서 q=0 이 아닌 인코딩 이름"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """사전 압축본 선택 + Cache-Control 을 붙이는 StaticFiles"""
+
+    def __init__(self, *args, cache_control: str = REVALIDATE_CACHE_CONTROL,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = None
+        if scope["method"] in ("GET", "HEAD"):
+            response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = self.cache_control
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    async def _precompressed_response(self, path: str,
+                                      scope: Scope) -> Response | None:
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(
+            request_headers.get("accept-encoding", ""))
+        source_stat = None
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted and "*" not in accepted:
+                continue
+            try:
+                if source_stat is None:
+                    _, source_stat = await anyio.to_thread.run_sync(
+                        self.lookup_path, path)
+                    if source_stat is None:
+                        return None
+                full_path, stat_result = await anyio.to_thread.run_sync(
+                    self.lookup_path, path + suffix)
+            except (OSError, ValueError):
+                return None
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            # 원본보다 오래된 압축본은 이전 빌드의 잔재이므로 무시
+            if stat_result.st_mtime < source_stat.st_mtime:
+                continue
+            media_type = mimetypes.guess_type(path)[0] or "text/plain"
+            response = FileResponse(full_path, stat_result=stat_result,
+                                    media_type=media_type,
+                                    headers={"Content-Encoding": encoding})
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None